@@ -0,0 +1,149 @@
+#! /usr/bin/python3
+# Python 3.10.X
+"""Benchmarks for the seam carving module, run with ``python benchmark.py <name>``"""
+
+import argparse
+import os
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+
+import numpy as np
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+
+
+def run_python(code, env=None):
+    """Runs code in a fresh interpreter from this directory and returns its stdout"""
+    result = subprocess.run(
+        [sys.executable, "-c", code], cwd=HERE, env=env, check=True, capture_output=True, text=True
+    )
+    return result.stdout.strip()
+
+
+def bench_startup(args):
+    """Cold (empty numba cache) vs warm (populated cache) startup of a fresh process"""
+    with tempfile.TemporaryDirectory() as cache_dir:
+        code = f"from ex1.warmup import warmup; print(warmup({cache_dir!r})['total'])"
+        cold = float(run_python(code))
+        warm = min(float(run_python(code)) for _ in range(args.repeat))
+    print(f"startup cold={cold:.3f}s warm={warm:.3f}s speedup={cold / warm:.1f}x")
+
+
+def bench_imports(args):
+    """Import time of the module in a fresh process, fails above the threshold"""
+    code = (
+        "import sys, time; start = time.perf_counter(); import ex1.seam_carving; "
+        "print(time.perf_counter() - start, 'numba' in sys.modules)"
+    )
+    samples = [run_python(code).split() for _ in range(args.repeat)]
+    seconds = min(float(elapsed) for elapsed, _ in samples)
+    numba_loaded = any(loaded == "True" for _, loaded in samples)
+    print(f"import ex1.seam_carving {seconds:.3f}s (threshold {args.threshold:.3f}s), numba loaded: {numba_loaded}")
+    if seconds > args.threshold or numba_loaded:
+        sys.exit("import time regression")
+
+
+def bench_compact(args):
+    """Working set and time of the int64 pipeline vs the compact float32/int8/int32 one"""
+    from ex1 import seam_carving as sc
+
+    rng = np.random.default_rng(0)
+    image = rng.integers(0, 256, (args.height, args.width, 3), dtype=np.uint8)
+    new_shape = (args.height, args.width - args.seams)
+    magnitude = sc.gradient_magnitude(image)
+    n, m = magnitude.shape
+    band_lo, band_hi = np.zeros(n, np.int64), np.full(n, m, np.int64)
+    for compact in (False, True):
+        mask = sc.generate_mask(n, m, np.int32 if compact else np.int64)
+        bias = np.zeros((n, m), np.float32 if compact else np.int64)
+        kernel = sc.calc_cost_compact if compact else sc.calc_cost
+        cost, backtrack = kernel(magnitude, mask, bias, band_lo, band_hi)  # compiles, and gives the array sizes
+        working_set = cost.nbytes + backtrack.nbytes + mask.nbytes + bias.nbytes
+        start = time.perf_counter()
+        sc.carve_vertical_seams(magnitude, new_shape, mask, compact=compact)
+        elapsed = time.perf_counter() - start
+        name = "compact" if compact else "int64"
+        print(f"{name:>7}: working set {working_set / 2**20:.1f} MiB, {args.seams} seams in {elapsed:.2f}s")
+
+
+def bench_resize(args):
+    """Peak memory and time of reshape_bilinear vs the tiled resize_bilinear"""
+    from ex1.resize import resize_bilinear
+    from ex1.seam_carving import reshape_bilinear
+
+    rng = np.random.default_rng(0)
+    image = rng.integers(0, 256, (args.height, args.width, 3), dtype=np.uint8)
+    new_shape = (args.height * args.scale, args.width * args.scale)
+    output_bytes = new_shape[0] * new_shape[1] * 3
+    runs = [
+        ("reshape_bilinear", lambda: reshape_bilinear(image, new_shape)),
+        ("resize_bilinear", lambda: resize_bilinear(image, new_shape, tile_rows=args.tile_rows)),
+        ("resize_bilinear threads", lambda: resize_bilinear(image, new_shape, tile_rows=args.tile_rows, workers=None)),
+    ]
+    for name, run in runs:
+        tracemalloc.start()
+        start = time.perf_counter()
+        run()
+        elapsed = time.perf_counter() - start
+        peak = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+        print(f"{name:>23}: {elapsed:.2f}s, peak {peak / 2**20:.1f} MiB ({peak / output_bytes:.1f}x the output)")
+
+
+def bench_service(args):
+    """Shrinking a hot image step by step: reshape_seam_carving from scratch vs the service"""
+    from ex1.seam_carving import CarvingScheme, reshape_seam_carving
+    from ex1.service import SeamCarvingService
+
+    rng = np.random.default_rng(0)
+    image = rng.integers(0, 256, (args.height, args.width, 3), dtype=np.uint8)
+    shapes = [(args.height - step, args.width - 2 * step) for step in range(0, args.steps * 4, 4)]
+    reshape_seam_carving(image[:8, :8], (6, 6), CarvingScheme.VERTICAL_HORIZONTAL)  # compiles the kernels
+    start = time.perf_counter()
+    for shape in shapes:
+        reshape_seam_carving(image, shape, CarvingScheme.VERTICAL_HORIZONTAL)
+    scratch = time.perf_counter() - start
+    with SeamCarvingService(lambda image_id: image) as service:
+        start = time.perf_counter()
+        for shape in shapes:
+            service.retarget("hot", shape)
+        cached = time.perf_counter() - start
+        stats = service.stats()
+    print(f"from scratch {scratch:.2f}s, service {cached:.2f}s, {stats}")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__)
+    sub = parser.add_subparsers(dest="bench", required=True)
+    startup = sub.add_parser("startup", help=bench_startup.__doc__)
+    startup.add_argument("--repeat", type=int, default=3)
+    startup.set_defaults(func=bench_startup)
+    imports = sub.add_parser("imports", help=bench_imports.__doc__)
+    imports.add_argument("--repeat", type=int, default=5)
+    imports.add_argument("--threshold", type=float, default=0.5, help="maximum import time in seconds")
+    imports.set_defaults(func=bench_imports)
+    compact = sub.add_parser("compact", help=bench_compact.__doc__)
+    compact.add_argument("--height", type=int, default=600)
+    compact.add_argument("--width", type=int, default=800)
+    compact.add_argument("--seams", type=int, default=20)
+    compact.set_defaults(func=bench_compact)
+    resize = sub.add_parser("resize", help=bench_resize.__doc__)
+    resize.add_argument("--height", type=int, default=1000)
+    resize.add_argument("--width", type=int, default=1500)
+    resize.add_argument("--scale", type=int, default=3)
+    resize.add_argument("--tile-rows", type=int, default=64)
+    resize.set_defaults(func=bench_resize)
+    service = sub.add_parser("service", help=bench_service.__doc__)
+    service.add_argument("--height", type=int, default=300)
+    service.add_argument("--width", type=int, default=400)
+    service.add_argument("--steps", type=int, default=8)
+    service.set_defaults(func=bench_service)
+    args = parser.parse_args(argv)
+    args.func(args)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,47 @@
+#! /usr/bin/python3
+# Python 3.10.X
+"""Lazy numba backend: importing the kernels does not import numba"""
+
+import functools
+import threading
+
+
+class LazyDispatcher:
+    """Wraps a function that is only compiled with ``numba.njit`` on its first call
+
+    Falls back to the plain python function when numba is not installed.
+    """
+
+    def __init__(self, func, options):
+        functools.update_wrapper(self, func)
+        self.py_func = func
+        self._options = options
+        self._dispatcher = None
+        self._lock = threading.Lock()
+
+    @property
+    def dispatcher(self):
+        """The compiled function, numba is imported on first access"""
+        if self._dispatcher is None:
+            with self._lock:
+                if self._dispatcher is None:
+                    try:
+                        from numba import njit as numba_njit
+                    except ImportError:
+                        self._dispatcher = self.py_func
+                    else:
+                        self._dispatcher = numba_njit(**self._options)(self.py_func)
+        return self._dispatcher
+
+    def __call__(self, *args, **kwargs):
+        return self.dispatcher(*args, **kwargs)
+
+
+def njit(func=None, **options):
+    """Drop-in replacement of ``numba.njit`` that defers the import and compilation
+
+    Supports both ``@njit`` and ``@njit(cache=True, ...)``.
+    """
+    if func is None:
+        return lambda f: LazyDispatcher(f, options)
+    return LazyDispatcher(func, options)
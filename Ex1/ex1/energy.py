@@ -0,0 +1,241 @@
+#! /usr/bin/python3
+# Python 3.10.X
+"""Energy functions for seam carving
+
+Every energy takes a greyscale image and returns an energy map of the same shape. They are
+registered by key in ``ENERGY_FUNCTIONS`` together with their radius (how far a change of the
+greyscale affects the energy), which ``update_energy_strip`` uses to only recompute the strip
+around a removed seam, and the greyscale conversion they work on. The default
+``EnergyScheme.GRADIENT`` is the original energy of the exercise (forward gradient of the greyscale
+truncated to integers, in float64), the other energies work on the float32 greyscale.
+"""
+
+from enum import IntEnum
+from typing import Callable, NamedTuple
+
+import numpy as np
+
+GREYSCALE_WT_DEFAULT = np.array([0.299, 0.587, 0.114], dtype=np.float64)
+ENTROPY_BINS = 16
+ENTROPY_RADIUS = 4
+SALIENCY_RADIUS = 7
+
+
+class EnergyScheme(IntEnum):
+    GRADIENT = 0
+    SOBEL = 1
+    ENTROPY = 2
+    SALIENCY = 3
+    GRADIENT_FLOAT32 = 4
+
+
+def greyscale_float(image, colour_wts=GREYSCALE_WT_DEFAULT):
+    """Greyscale image in float32, without truncating to integers
+
+    Args:
+        image (np.array): n by m by 3 image
+        colour_wts (np.array, optional): weights of each colour. Defaults to GREYSCALE_WT_DEFAULT.
+
+    Returns:
+        np.array: n by m float32 greyscale image
+    """
+    return image.astype(np.float32) @ np.asarray(colour_wts, dtype=np.float32)
+
+
+def greyscale_truncated(image, colour_wts=GREYSCALE_WT_DEFAULT):
+    """Greyscale image truncated to integers like get_greyscale_image, in float64
+
+    Args:
+        image (np.array): n by m by 3 image
+        colour_wts (np.array, optional): weights of each colour. Defaults to GREYSCALE_WT_DEFAULT.
+
+    Returns:
+        np.array: n by m float64 greyscale image with integer values
+    """
+    return np.uint8(image @ colour_wts).astype(np.float64)
+
+
+class EnergyFunction(NamedTuple):
+    func: Callable[[np.ndarray], np.ndarray]
+    radius: int
+    greyscale: Callable[..., np.ndarray] = greyscale_float
+
+
+ENERGY_FUNCTIONS = {}
+
+
+def register_energy(key, radius, greyscale=greyscale_float):
+    """Decorator registering an energy function under key
+
+    Args:
+        key (Hashable): the name the energy is selected with (an EnergyScheme for the built in ones)
+        radius (int): how many pixels away a change of the greyscale can change the energy
+        greyscale (Callable, optional): converts the rgb image to the greyscale the energy takes. Defaults to greyscale_float.
+    """
+
+    def register(func):
+        ENERGY_FUNCTIONS[key] = EnergyFunction(func, radius, greyscale)
+        return func
+
+    return register
+
+
+def get_energy_function(energy):
+    """Returns the EnergyFunction for a registered key, an EnergyFunction or a plain callable
+
+    Args:
+        energy (Hashable | EnergyFunction | Callable): the energy to use, a plain callable is assumed to have radius 1
+
+    Returns:
+        EnergyFunction: the function and its radius
+    """
+    if isinstance(energy, EnergyFunction):
+        return energy
+    if callable(energy):
+        return EnergyFunction(energy, 1)
+    try:
+        return ENERGY_FUNCTIONS[energy]
+    except KeyError:
+        raise ValueError(f"Unknown energy {energy!r}") from None
+
+
+def energy_greyscale(image, energy=EnergyScheme.GRADIENT, colour_wts=GREYSCALE_WT_DEFAULT):
+    """The greyscale of an rgb image that an energy works on
+
+    Args:
+        image (np.array): n by m by 3 image
+        energy (Hashable | EnergyFunction | Callable, optional): energy to use. Defaults to EnergyScheme.GRADIENT.
+        colour_wts (np.array, optional): greyscale weights. Defaults to GREYSCALE_WT_DEFAULT.
+
+    Returns:
+        np.array: n by m greyscale image
+    """
+    return get_energy_function(energy).greyscale(image, colour_wts)
+
+
+def compute_energy(image, energy=EnergyScheme.GRADIENT, colour_wts=GREYSCALE_WT_DEFAULT):
+    """Energy map of an rgb image
+
+    Args:
+        image (np.array): n by m by 3 image
+        energy (Hashable | EnergyFunction | Callable, optional): energy to use. Defaults to EnergyScheme.GRADIENT.
+        colour_wts (np.array, optional): greyscale weights. Defaults to GREYSCALE_WT_DEFAULT.
+
+    Returns:
+        np.array: n by m energy map, float64 for EnergyScheme.GRADIENT and float32 for the others
+    """
+    energy = get_energy_function(energy)
+    return energy.func(energy.greyscale(image, colour_wts))
+
+
+def _box_sum(x, radius):
+    """Sum over the (2 * radius + 1)^2 window around each pixel (clipped at the borders)"""
+    n, m = x.shape
+    integral = np.zeros((n + 1, m + 1), dtype=np.float64)
+    np.cumsum(np.cumsum(x, axis=0, dtype=np.float64), axis=1, out=integral[1:, 1:])
+    rows, cols = np.arange(n), np.arange(m)
+    top, bottom = np.clip(rows - radius, 0, n), np.clip(rows + radius + 1, 0, n)
+    left, right = np.clip(cols - radius, 0, m), np.clip(cols + radius + 1, 0, m)
+    return (
+        integral[bottom][:, right] - integral[top][:, right] - integral[bottom][:, left] + integral[top][:, left]
+    ).astype(np.float32)
+
+
+@register_energy(EnergyScheme.GRADIENT_FLOAT32, radius=1)
+def forward_gradient(grey):
+    """Magnitude of the forward differences, the image is padded with zeros after the last row/column
+
+    Computed in the dtype of grey: on the truncated float64 greyscale it is exactly the original
+    gradient magnitude of the exercise.
+    """
+    energy = np.empty_like(grey)
+    scratch = np.empty_like(grey)
+    np.subtract(grey[:, 1:], grey[:, :-1], out=energy[:, :-1])
+    energy[:, -1] = -grey[:, -1]
+    np.square(energy, out=energy)
+    np.subtract(grey[1:], grey[:-1], out=scratch[:-1])
+    scratch[-1] = -grey[-1]
+    np.square(scratch, out=scratch)
+    energy += scratch
+    return np.sqrt(energy, out=energy)
+
+
+register_energy(EnergyScheme.GRADIENT, radius=1, greyscale=greyscale_truncated)(forward_gradient)
+
+
+@register_energy(EnergyScheme.SOBEL, radius=1)
+def sobel(grey):
+    """Magnitude of the 3 by 3 Sobel gradient, the borders are replicated"""
+    p = np.pad(grey, 1, mode="edge")
+    energy = np.empty_like(grey)
+    scratch = np.empty_like(grey)
+    # horizontal: right column - left column, weighted 1 2 1
+    np.subtract(p[:-2, 2:], p[:-2, :-2], out=energy)
+    energy += p[2:, 2:]
+    energy -= p[2:, :-2]
+    np.subtract(p[1:-1, 2:], p[1:-1, :-2], out=scratch)
+    scratch *= 2
+    energy += scratch
+    np.square(energy, out=energy)
+    # vertical: bottom row - top row, weighted 1 2 1
+    np.subtract(p[2:, :-2], p[:-2, :-2], out=scratch)
+    scratch += p[2:, 2:]
+    scratch -= p[:-2, 2:]
+    scratch += 2 * (p[2:, 1:-1] - p[:-2, 1:-1])
+    np.square(scratch, out=scratch)
+    energy += scratch
+    return np.sqrt(energy, out=energy)
+
+
+@register_energy(EnergyScheme.ENTROPY, radius=ENTROPY_RADIUS)
+def local_entropy(grey):
+    """Forward gradient plus the entropy of the greyscale histogram of the window around each pixel"""
+    bins = np.minimum((grey * (ENTROPY_BINS / 256)).astype(np.int8), ENTROPY_BINS - 1)
+    counts = _box_sum(np.ones_like(grey), ENTROPY_RADIUS)
+    entropy = np.zeros_like(grey)
+    for b in range(ENTROPY_BINS):
+        p = _box_sum((bins == b).astype(np.float32), ENTROPY_RADIUS)
+        p /= counts
+        entropy -= p * np.log2(p, out=np.zeros_like(p), where=p > 0)
+    energy = forward_gradient(grey)
+    energy += entropy * (255 / np.log2(ENTROPY_BINS))  # same scale as the gradient
+    return energy
+
+
+@register_energy(EnergyScheme.SALIENCY, radius=SALIENCY_RADIUS + 1)
+def saliency_weighted(grey):
+    """Forward gradient weighted up where a pixel stands out from its surroundings (centre-surround contrast)"""
+    window = _box_sum(np.ones_like(grey), SALIENCY_RADIUS)
+    contrast = _box_sum(grey, SALIENCY_RADIUS)
+    contrast /= window
+    contrast -= grey
+    np.abs(contrast, out=contrast)
+    contrast *= 1 / 255
+    contrast += 1
+    energy = forward_gradient(grey)
+    energy *= contrast
+    return energy
+
+
+def update_energy_strip(magnitude, greyscale, mask, masked_seam, energy=EnergyScheme.GRADIENT):
+    """Recomputes the energy around a seam that was just removed from the mask
+
+    Only the columns between the leftmost and rightmost seam pixels (widened by the energy radius)
+    are recomputed, on the greyscale seen through the mask, and written back in place.
+
+    Args:
+        magnitude (np.array): energy of the original image, updated in place - N by M
+        greyscale (np.array): greyscale of the original image, see energy_greyscale - N by M
+        mask (np.array): mask after the removal of the seam - n by m by 2
+        masked_seam (np.array): the removed seam in the coordinates of the mask before the removal - n by 2
+        energy (Hashable | EnergyFunction | Callable, optional): energy used for magnitude. Defaults to EnergyScheme.GRADIENT.
+    """
+    func, radius, _ = get_energy_function(energy)
+    width = mask.shape[1]
+    lo = max(int(masked_seam[:, 1].min()) - radius - 1, 0)
+    hi = min(int(masked_seam[:, 1].max()) + radius + 1, width)
+    context_lo, context_hi = max(lo - radius, 0), min(hi + radius, width)
+    strip = mask[:, context_lo:context_hi]
+    strip_energy = func(np.ascontiguousarray(greyscale[strip[..., 0], strip[..., 1]]))
+    inner = mask[:, lo:hi]
+    magnitude[inner[..., 0], inner[..., 1]] = strip_energy[:, lo - context_lo : hi - context_lo]
@@ -0,0 +1,106 @@
+#! /usr/bin/python3
+# Python 3.10.X
+"""Bilinear resizing of images that do not fit in memory several times over
+
+The output is produced in tiles of rows with a separable interpolation: the rows of a tile are
+first interpolated vertically from the two source rows they fall between, then horizontally from
+index and weight tables computed once per call. Every intermediate is a float32 buffer of at most
+one tile, allocated once per worker, so the memory used on top of the input and output does not
+depend on the image size. The input and output can be memory mapped (e.g. ``np.load(mmap_mode="r")``
+and ``np.lib.format.open_memmap``).
+"""
+
+import os
+from concurrent.futures import ThreadPoolExecutor
+from typing import NamedTuple
+
+import numpy as np
+
+TILE_ROWS_DEFAULT = 64
+
+
+class AxisTable(NamedTuple):
+    lo: np.ndarray
+    hi: np.ndarray
+    weight: np.ndarray
+
+
+def axis_table(in_len, out_len):
+    """Source indices and weights of the output samples along one axis
+
+    The samples are spread like in ``reshape_bilinear``: the first and last ones fall on the first
+    and last source pixels.
+
+    Args:
+        in_len (int): length of the source axis
+        out_len (int): length of the output axis
+
+    Returns:
+        AxisTable: the indices before (lo) and after (hi) each sample, and the float32 weight of hi
+    """
+    positions = np.linspace(0, in_len - 1, num=out_len)
+    lo = positions.astype(np.intp)
+    hi = np.ceil(positions).astype(np.intp)
+    return AxisTable(lo, hi, (positions - lo).astype(np.float32))
+
+
+def _resize_tiles(image, out, rows, cols, tiles, tile_rows):
+    """Writes the given tiles (start, stop) of output rows, with buffers of one tile"""
+    channels = image.shape[2:]
+    vertical = np.empty((tile_rows, image.shape[1], *channels), dtype=np.float32)
+    left = np.empty((tile_rows, out.shape[1], *channels), dtype=np.float32)
+    right = np.empty_like(left)
+    col_weight = cols.weight.reshape(1, -1, *(1 for _ in channels))
+    for start, stop in tiles:
+        k = stop - start
+        v, a, b = vertical[:k], left[:k], right[:k]
+        for j, i in enumerate(range(start, stop)):
+            lo, hi = image[rows.lo[i]], image[rows.hi[i]]
+            np.subtract(hi, lo, out=v[j], dtype=np.float32)
+            v[j] *= rows.weight[i]
+            v[j] += lo
+        np.take(v, cols.lo, axis=1, out=a)
+        np.take(v, cols.hi, axis=1, out=b)
+        b -= a
+        b *= col_weight
+        b += a
+        np.copyto(out[start:stop], b, casting="unsafe")  # truncates like reshape_bilinear
+
+
+def resize_bilinear(image, new_shape, out=None, tile_rows=TILE_ROWS_DEFAULT, workers=0):
+    """Resizes an image with bilinear interpolation in a fixed amount of memory
+
+    Args:
+        image (np.array): the image - n by m, or n by m by channels
+        new_shape (Tuple[int, int]): the (height, width) of the output
+        out (np.array, optional): array the output is written to, e.g. a memory mapped file. Defaults to a new array of the dtype of image.
+        tile_rows (int, optional): number of output rows interpolated at once. Defaults to TILE_ROWS_DEFAULT.
+        workers (int, optional): number of threads interpolating tiles, 0 works in the calling thread and None uses one per processor. Defaults to 0.
+
+    Returns:
+        np.array: out, the resized image
+    """
+    out_height, out_width = new_shape
+    shape = (out_height, out_width, *image.shape[2:])
+    if out is None:
+        out = np.empty(shape, dtype=image.dtype)
+    elif out.shape != shape:
+        raise ValueError(f"out has shape {out.shape}, expected {shape}")
+    rows = axis_table(image.shape[0], out_height)
+    cols = axis_table(image.shape[1], out_width)
+    tiles = [(start, min(start + tile_rows, out_height)) for start in range(0, out_height, tile_rows)]
+    tile_rows = min(tile_rows, out_height)
+    if workers == 0:
+        _resize_tiles(image, out, rows, cols, tiles, tile_rows)
+        return out
+
+    workers = workers or os.cpu_count() or 1
+    # each worker gets every workers-th tile, and allocates its buffers once
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        futures = [
+            executor.submit(_resize_tiles, image, out, rows, cols, tiles[w::workers], tile_rows)
+            for w in range(workers)
+        ]
+        for future in futures:
+            future.result()
+    return out
@@ -3,10 +3,14 @@
 
 import numpy as np
 from enum import IntEnum
-from numba import njit
 
-GREYSCALE_WT_DEFAULT = np.array([0.299, 0.587, 0.114], dtype=np.float64)
+from ex1._jit import njit
+from ex1.energy import GREYSCALE_WT_DEFAULT, EnergyScheme, compute_energy, energy_greyscale, update_energy_strip
+
 SEAMS_COLOR_DEFAULT = np.array([0, 0, 0], dtype=np.uint8)
+PROTECT_ENERGY = 10**6  # added to the energy of protected pixels
+REMOVE_ENERGY = 10**6  # subtracted from the energy of pixels to remove
+OUT_OF_RANGE_COST = 2**62  # cost of moving a seam out of the image
 
 
 class CarvingScheme(IntEnum):
@@ -89,24 +93,22 @@ def gradient_magnitude(image, colour_wts=GREYSCALE_WT_DEFAULT):
     :param colour_wts: the weights of each colour in rgb (> 0)
     :returns: The gradient image
     """
-    greyscale = np.int64(get_greyscale_image(image, colour_wts))
-    gradient = func_gradient(greyscale)
-    magnitude = func_magnitude(gradient)
-    return magnitude
+    return compute_energy(image, EnergyScheme.GRADIENT, colour_wts)
 
 
-def generate_mask(x_len, y_len):
+def generate_mask(x_len, y_len, dtype=np.int64):
     """Generate an index matrix
 
     Args:
         x_len (int): x length
         y_len (int): y length
+        dtype (np.dtype, optional): index type, int32 for the compact pipeline. Defaults to np.int64.
 
     Returns:
         np.array: a x_len by y_len matrix with each cell containing its index
     """
-    A_ = np.arange(x_len, dtype=np.int64)[:, None].repeat(y_len, axis=1)
-    B_ = np.arange(y_len, dtype=np.int64)[:, None].T.repeat(x_len, axis=0)
+    A_ = np.arange(x_len, dtype=dtype)[:, None].repeat(y_len, axis=1)
+    B_ = np.arange(y_len, dtype=dtype)[:, None].T.repeat(x_len, axis=0)
     return np.dstack((A_, B_))
 
 
@@ -121,14 +123,13 @@ def remove_seams_from_mask(seam, mask):
         np.array: a new mask with one less vertical seam
     """
     shape = mask.shape
-    temp_mask = np.full(shape, True, dtype=bool)
-    for index in seam:
-        temp_mask[index[0], index[1]] = [False, False]
+    temp_mask = np.full(shape[:2], True, dtype=bool)
+    temp_mask[seam[:, 0], seam[:, 1]] = False
     new_mask = mask[temp_mask].reshape(shape[0], shape[1] - 1, 2)
     return new_mask
 
 
-@njit
+@njit(cache=True, nogil=True)
 def traceback(Cost, prev_pointers, mask):
     """Returns an array of tracebacks for vertical seams (only)
     Args:
@@ -152,13 +153,16 @@ def traceback(Cost, prev_pointers, mask):
     return masked_arr_pointers, arr_pointers
 
 
-@njit(cache=True)
-def calc_cost(magnitude, mask):
+@njit(cache=True, nogil=True)
+def calc_cost(magnitude, mask, bias, band_lo, band_hi):
     """ Uses Dynamic programming on the magintude to calculate a cost matrix 
 
     Args:
         magnitude (np.array): original magnitude matrix of the original image
         mask (np.array): hidden part of the original image - n by m by 2
+        bias (np.array): energy added to each pixel of the original image (protection / removal) - N by M
+        band_lo (np.array): first column the seam may use in each row - n
+        band_hi (np.array): column after the last one the seam may use in each row - n
 
     Returns:
         Tuple[np.array, np.array]: Returns the cost matrix and a backtrack matrix that corresponds to the pixels
@@ -169,8 +173,9 @@ def calc_cost(magnitude, mask):
         if y >= 0 and y < y_len
         else 9999  # absurd value if you try to access out of range
     )
-    pixel_cost = np.zeros((x_len, y_len), dtype=np.int64)
-    pixel_cost[0] = [pixel(0, y) for y in range(y_len)]
+    pixel_cost = np.full((x_len, y_len), OUT_OF_RANGE_COST, dtype=np.int64)  # cells out of the band stay unreachable
+    for y in range(band_lo[0], band_hi[0]):
+        pixel_cost[0, y] = pixel(0, y) + bias[mask[0, y, 0], mask[0, y, 1]]
     c_t = lambda x, y: np.absolute(
         pixel(x, max(y - 1, 0)) - pixel(x, min(y + 1, y_len - 1))  # top value
     )
@@ -178,34 +183,214 @@ def calc_cost(magnitude, mask):
     c_r = lambda x, y: np.absolute(pixel(x, y + 1) - pixel(x - 1, y))  # right value
     backtrack = np.zeros(mask.shape, dtype=np.int64)
     for x in range(1, x_len):
-        for y in range(y_len):
+        for y in range(band_lo[x], band_hi[x]):
             energy_options = np.zeros(3, dtype=np.int64)
-            energy_options[0] = pixel_cost[x - 1, y - 1] + c_t(x, y) + c_l(x, y)
+            energy_options[0] = (
+                pixel_cost[x - 1, y - 1] + c_t(x, y) + c_l(x, y) if y > 0 else OUT_OF_RANGE_COST
+            )
             energy_options[1] = pixel_cost[x - 1, y] + c_t(x, y)
-            energy_options[2] = pixel_cost[x - 1, y + 1] + c_t(x, y) + c_r(x, y)
+            energy_options[2] = (
+                pixel_cost[x - 1, y + 1] + c_t(x, y) + c_r(x, y) if y < y_len - 1 else OUT_OF_RANGE_COST
+            )
             min_energy = np.min(energy_options)
             backtrack[x, y] = [x - 1, y + np.argmin(energy_options) - 1]
-            pixel_cost[x, y] = pixel(x, y) + min_energy
+            pixel_cost[x, y] = min(pixel(x, y) + bias[mask[x, y, 0], mask[x, y, 1]] + min_energy, OUT_OF_RANGE_COST)
     return pixel_cost, backtrack
 
 
-def carve_vertical_seams(magnitude, new_shape, mask):
+@njit(cache=True, nogil=True)
+def calc_cost_compact(magnitude, mask, bias, band_lo, band_hi):
+    """Same dynamic programming as calc_cost with a compact working set
+
+    The cost is float32 and the backtrack keeps only the column offset (-1, 0 or 1) of the
+    previous pixel in an int8 instead of its full int64 coordinates.
+
+    Args:
+        magnitude (np.array): float32 magnitude matrix of the original image - N by M
+        mask (np.array): int32 hidden part of the original image - n by m by 2
+        bias (np.array): float32 energy added to each pixel of the original image - N by M
+        band_lo (np.array): first column the seam may use in each row - n
+        band_hi (np.array): column after the last one the seam may use in each row - n
+
+    Returns:
+        Tuple[np.array, np.array]: the n by m cost and the n by m column offsets
+    """
+    x_len, y_len, _ = mask.shape
+    cost = np.full((x_len, y_len), np.inf, dtype=np.float32)  # cells out of the band stay unreachable
+    offsets = np.zeros((x_len, y_len), dtype=np.int8)
+    above = np.empty(y_len, dtype=np.float32)  # energy of the previous row seen through the mask
+    row = np.empty(y_len, dtype=np.float32)
+    for y in range(y_len):
+        above[y] = magnitude[mask[0, y, 0], mask[0, y, 1]]
+    for y in range(band_lo[0], band_hi[0]):
+        cost[0, y] = above[y] + bias[mask[0, y, 0], mask[0, y, 1]]
+    for x in range(1, x_len):
+        for y in range(y_len):
+            row[y] = magnitude[mask[x, y, 0], mask[x, y, 1]]
+        for y in range(band_lo[x], band_hi[x]):
+            c_t = abs(row[max(y - 1, 0)] - row[min(y + 1, y_len - 1)])
+            best = np.float32(np.inf)
+            offset = 0
+            if y > 0:  # ties go to the left, like the argmin of calc_cost
+                best = cost[x - 1, y - 1] + c_t + abs(row[y - 1] - above[y])
+                offset = -1
+            if cost[x - 1, y] + c_t < best:
+                best = cost[x - 1, y] + c_t
+                offset = 0
+            if y < y_len - 1 and cost[x - 1, y + 1] + c_t + abs(row[y + 1] - above[y]) < best:
+                best = cost[x - 1, y + 1] + c_t + abs(row[y + 1] - above[y])
+                offset = 1
+            cost[x, y] = row[y] + bias[mask[x, y, 0], mask[x, y, 1]] + best
+            offsets[x, y] = offset
+        above, row = row, above
+    return cost, offsets
+
+
+@njit(cache=True, nogil=True)
+def traceback_compact(cost, offsets, mask):
+    """Follows the column offsets of calc_cost_compact from the cheapest pixel of the last row
+
+    Args:
+        cost (np.array): float32 cost - n by m
+        offsets (np.array): int8 column offsets to the previous pixel - n by m
+        mask (np.array): int32 hidden part of the original image - n by m by 2
+
+    Returns:
+        (np.array, np.array): two int32 n by 2 matrices, the seam in the masked and in the original image
+    """
+    x_len = cost.shape[0]
+    masked_seam = np.empty((x_len, 2), np.int32)
+    seam = np.empty((x_len, 2), np.int32)
+    y = cost[x_len - 1].argmin()
+    for x in range(x_len - 1, -1, -1):
+        masked_seam[x, 0] = x
+        masked_seam[x, 1] = y
+        seam[x] = mask[x, y]
+        y += offsets[x, y]
+    return masked_seam, seam
+
+
+@njit(cache=True, nogil=True)
+def guide_band(mask, guide, band):
+    """Columns around a guide seam (e.g. the same seam in the previous video frame) the seam may use
+
+    Args:
+        mask (np.array): hidden part of the original image - n by m by 2
+        guide (np.array): the guide seam in the coordinates of the original image - n by 2
+        band (int): how many columns the seam may move away from the guide in each row
+
+    A seam moves by at most one column per row, so when the guide jumps further than the band
+    allows, a row's band is widened towards the columns reachable from the rows above. Every row
+    then has a reachable cell and the seam drifts back to the guide after the jump.
+
+    Returns:
+        Tuple[np.array, np.array]: first and after-last allowed column of each row of the mask
+    """
+    x_len, y_len, _ = mask.shape
+    band_lo = np.empty(x_len, np.int64)
+    band_hi = np.empty(x_len, np.int64)
+    reach_lo, reach_hi = 0, y_len  # columns a seam through the bands of the rows above can get to
+    for x in range(x_len):
+        y = np.searchsorted(mask[x, :, 1], guide[x, 1])  # the guide pixel (or where it was) in the mask
+        lo, hi = max(y - band, 0), min(y + band + 1, y_len)
+        if lo >= reach_hi:
+            lo = reach_hi - 1
+        elif hi <= reach_lo:
+            hi = reach_lo + 1
+        band_lo[x], band_hi[x] = lo, hi
+        reach_lo, reach_hi = max(lo, reach_lo) - 1, min(hi, reach_hi) + 1
+        reach_lo, reach_hi = max(reach_lo, 0), min(reach_hi, y_len)
+    return band_lo, band_hi
+
+
+def region_bias(shape, protect=None, remove=None, weight=None):
+    """Energy bias of the pixels to protect (positive) and to remove (negative)
+
+    The bias stays in the coordinates of the original image, the cost kernel reads it through the
+    same index mask as the energy, so it never needs to be re-mapped when seams are removed.
+
+    Args:
+        shape (Tuple[int, int]): shape of the image
+        protect (np.array, optional): boolean mask of the pixels to keep. Defaults to None.
+        remove (np.array, optional): boolean mask of the pixels to remove. Defaults to None.
+        weight (int, optional): bias of a protected pixel (and minus that of a removed one), see
+            compact_region_weight. Defaults to PROTECT_ENERGY and REMOVE_ENERGY.
+
+    Returns:
+        np.array: int64 bias of each pixel
+    """
+    bias = np.zeros(shape, dtype=np.int64)
+    protect_weight, remove_weight = (PROTECT_ENERGY, REMOVE_ENERGY) if weight is None else (weight, weight)
+    for region, region_weight in ((protect, protect_weight), (remove, -remove_weight)):
+        if region is None:
+            continue
+        if region.shape != tuple(shape):
+            raise ValueError("Region masks must have the shape of the image")
+        bias[region.astype(bool)] += region_weight
+    return bias
+
+
+def compact_region_weight(magnitude):
+    """Region bias for the float32 costs of the compact pipeline
+
+    A seam costs at most 3 times the largest energy per pixel, the power of two just above that
+    along the longer side of the image still outweighs any seam, while the fixed PROTECT_ENERGY
+    would leave fewer float32 bits for the energy of the seams through a region.
+
+    Args:
+        magnitude (np.array): energy of the image - n by m
+
+    Returns:
+        int: the weight to pass to region_bias
+    """
+    return 1 << int(np.ceil(3 * float(magnitude.max()) * max(magnitude.shape) + 1)).bit_length()
+
+
+def carve_vertical_seams(
+    magnitude,
+    new_shape,
+    mask,
+    greyscale=None,
+    energy=EnergyScheme.GRADIENT,
+    bias=None,
+    guide=None,
+    band=3,
+    compact=False,
+):
     """Delete vertical seams until the mask row length matches the new shape
 
     Args:
         magnitude (np.array): Magnitude of the gradient of the original image n by m
         new_shape (Tuple[int, int]): New desired shape
         mask(np.array): hidden part of the original image - n by m by 2
+        greyscale (np.array, optional): greyscale of the original image, if given the energy around
+            each removed seam is recomputed (magnitude is updated in place). Defaults to None.
+        energy (EnergyScheme | EnergyFunction | Callable, optional): energy magnitude was computed with. Defaults to EnergyScheme.GRADIENT.
+        bias (np.array, optional): energy bias of each pixel of the original image, see region_bias. Defaults to None.
+        guide (List[np.array], optional): seams of a similar image (the previous video frame), seam i
+            is only searched within band columns of guide[i]. Defaults to None.
+        band (int, optional): half width of the search band around the guide seams. Defaults to 3.
+        compact (bool, optional): use the float32 / int8 kernels, the mask must be int32. Defaults to False.
 
     Returns:
         Tuple[np.array, np.array]: The mask resulting from removing the seams and list of seams
     """
+    cost_kernel, traceback_kernel = (calc_cost_compact, traceback_compact) if compact else (calc_cost, traceback)
+    if bias is None:
+        bias = np.zeros(magnitude.shape, dtype=np.float32 if compact else np.int64)
+    guide = [] if guide is None else guide
     seams = []
-    for _ in range(mask.shape[1] - new_shape[1]):
-        cost, backtrack = calc_cost(magnitude, mask)
-        masked_seam, seam = traceback(Cost=cost, prev_pointers=backtrack, mask=mask)
+    for i in range(mask.shape[1] - new_shape[1]):
+        if i < len(guide):
+            band_lo, band_hi = guide_band(mask, guide[i], band)
+        else:
+            band_lo, band_hi = np.zeros(mask.shape[0], np.int64), np.full(mask.shape[0], mask.shape[1], np.int64)
+        cost, backtrack = cost_kernel(magnitude, mask, bias, band_lo, band_hi)
+        masked_seam, seam = traceback_kernel(cost, backtrack, mask)
         seams.append(seam)
         mask = remove_seams_from_mask(seam=masked_seam, mask=mask)
+        if greyscale is not None:
+            update_energy_strip(magnitude, greyscale, mask, masked_seam, energy)
     return mask, seams
 
 
@@ -254,6 +439,15 @@ def get_seams(
     colour_wts=GREYSCALE_WT_DEFAULT,
     concat=True,
     mask=None,
+    energy=EnergyScheme.GRADIENT,
+    update_energy=False,
+    magnitude=None,
+    protect=None,
+    remove=None,
+    bias=None,
+    guide=None,
+    band=3,
+    compact=False,
 ):
     """Generates the seams such that the new picture matches the desired shape if the seams were removed
 
@@ -264,6 +458,18 @@ def get_seams(
         colour_wts (List[int, int int], optional): Greayscale weights. Defaults to GREYSCALE_WT_DEFAULT.
         concat (bool, optional): If we want to have one list for both the horizontal and vertical seams. Defaults to True.
         mask (np.array, optional): The mask generated by the iterative removal of seams. Defaults to None.
+        energy (EnergyScheme | EnergyFunction | Callable, optional): energy function, see ex1.energy. Defaults to EnergyScheme.GRADIENT.
+        update_energy (bool, optional): recompute the energy around each removed seam instead of
+            using the energy of the original image throughout. Defaults to False.
+        magnitude (np.array, optional): energy of the image, computed when None. Defaults to None.
+        protect (np.array, optional): boolean n by m mask of pixels seams should avoid. Defaults to None.
+        remove (np.array, optional): boolean n by m mask of pixels seams should go through. Defaults to None.
+        bias (np.array, optional): energy bias from region_bias, computed from protect and remove when None. Defaults to None.
+        guide (Tuple[List[np.array], List[np.array]], optional): vertical and horizontal seams of a similar
+            image (the previous video frame) to search the seams around. Defaults to None.
+        band (int, optional): how far (in pixels) the seams may move from the guide seams. Defaults to 3.
+        compact (bool, optional): float32 costs, int8 backtracking and int32 masks and seams, for a
+            smaller working set on large images. Defaults to False.
 
     Returns:
         np.array | Tuple[np.array, np.array, np.array]: A list of seams or a tuple with vertical seams, horizontal seams and the mask
@@ -274,18 +480,39 @@ def get_seams(
         raise ValueError("Cannot have negative dimensions")
     if new_shape[0] == 0 or new_shape[1] == 0:
         raise ValueError("New image cannot be empty")
-    grad_magnitude = gradient_magnitude(image, colour_wts)
+    grad_magnitude = compute_energy(image, energy, colour_wts) if magnitude is None else magnitude
+    if compact:
+        grad_magnitude = grad_magnitude.astype(np.float32, copy=False)
+    greyscale = energy_greyscale(image, energy, colour_wts) if update_energy else None
+    if bias is None:
+        if compact:
+            weight = compact_region_weight(grad_magnitude)
+            bias = region_bias(image.shape[:2], protect, remove, weight).astype(np.float32)
+        else:
+            bias = region_bias(image.shape[:2], protect, remove)
+    guide_vertical, guide_horizontal = ([], []) if guide is None else guide
     seams_vertical = []
     seams_horizontal = []
     if mask is None:
-        mask = generate_mask(grad_magnitude.shape[0], grad_magnitude.shape[1])
+        mask = generate_mask(grad_magnitude.shape[0], grad_magnitude.shape[1], np.int32 if compact else np.int64)
     match carving_scheme:
         case CarvingScheme.VERTICAL_HORIZONTAL:
-            mask, seams_vertical = carve_vertical_seams(grad_magnitude, new_shape, mask)
+            mask, seams_vertical = carve_vertical_seams(
+                grad_magnitude, new_shape, mask, greyscale, energy, bias, guide_vertical, band, compact
+            )
             grad_magnitude_T = grad_magnitude.T
+            greyscale_T = None if greyscale is None else greyscale.T
             mask_T = np.flip(np.transpose(mask, (1, 0, 2)), axis=2) # only transpose x and y axes and index [x, y] -> [y, x]
             mask_T, seams_horizontal_temp = carve_vertical_seams( 
-                grad_magnitude_T, new_shape[::-1], mask_T
+                grad_magnitude_T,
+                new_shape[::-1],
+                mask_T,
+                greyscale_T,
+                energy,
+                bias.T,
+                [np.flip(seam, axis=1) for seam in guide_horizontal],
+                band,
+                compact,
             )
             if seams_horizontal_temp: # return elements back to their original shape
                 seams_horizontal = list(np.flip(seams_horizontal_temp, axis=2))
@@ -299,6 +526,16 @@ def get_seams(
                 colour_wts,
                 concat=False,
                 mask=mask_T,
+                energy=energy,
+                update_energy=update_energy,
+                magnitude=grad_magnitude.T,
+                bias=bias.T,
+                guide=(
+                    [np.flip(seam, axis=1) for seam in guide_horizontal],
+                    [np.flip(seam, axis=1) for seam in guide_vertical],
+                ),
+                band=band,
+                compact=compact,
             )
             mask = np.flip(np.transpose(mask_T, (1, 0, 2)), axis=2)
             seams_vertical = (
@@ -312,6 +549,8 @@ def get_seams(
                 else []
             )
         case CarvingScheme.INTERMITTENT:
+            if guide is not None:
+                raise ValueError("Guide seams are not supported by the intermittent scheme")
             # Uses vertical carving by reducing size by 1 iteratively
             for i in range(
                 1, max(image.shape[0] - new_shape[0], image.shape[1] - new_shape[1]) + 1
@@ -326,6 +565,11 @@ def get_seams(
                     colour_wts,
                     concat=False,
                     mask=mask,
+                    energy=energy,
+                    update_energy=update_energy,
+                    magnitude=grad_magnitude,
+                    bias=bias,
+                    compact=compact,
                 )
                 seams_vertical.extend(seams_vertical_temp)
                 seams_horizontal.extend(seams_horizontal_temp)
@@ -355,7 +599,15 @@ def overwrite_seams_pixels(image, seams, colour=[0, 0, 0]):
 
 
 def reshape_seam_carving(
-    image, new_shape, carving_scheme, colour_wts=GREYSCALE_WT_DEFAULT
+    image,
+    new_shape,
+    carving_scheme,
+    colour_wts=GREYSCALE_WT_DEFAULT,
+    energy=EnergyScheme.GRADIENT,
+    update_energy=False,
+    compact=False,
+    protect=None,
+    remove=None,
 ):
     """
     Resizes an image to new shape using seam carving
@@ -363,11 +615,68 @@ def reshape_seam_carving(
     :param new_shape: a (height, width) tuple which is the new shape
     :param carving_scheme: the carving scheme to be used.
     :param colour_wts: greyscale color weights if a different ration is desired
+    :param energy: the energy function (see ex1.energy)
+    :param update_energy: recompute the energy around each removed seam
+    :param compact: use the compact float32 / int8 / int32 pipeline
+    :param protect: boolean mask of the pixels seams should avoid
+    :param remove: boolean mask of the pixels seams should go through
     :returns: the image resized to new_shape
     """
-    *_, mask = get_seams(image, new_shape, carving_scheme, colour_wts, concat=False)
-    new_image = np.zeros((new_shape[0], new_shape[1], 3), dtype=np.int64)
-    for x in range(mask.shape[0]):
-        for y in range(mask.shape[1]):
-            new_image[x, y] = image[mask[x, y, 0], mask[x, y, 1]]
-    return np.array(new_image, dtype=np.uint8)
+    *_, mask = get_seams(
+        image,
+        new_shape,
+        carving_scheme,
+        colour_wts,
+        concat=False,
+        energy=energy,
+        update_energy=update_energy,
+        protect=protect,
+        remove=remove,
+        compact=compact,
+    )
+    return np.uint8(image[mask[..., 0], mask[..., 1]])
+
+
+def remove_object(
+    image, remove, protect=None, colour_wts=GREYSCALE_WT_DEFAULT, energy=EnergyScheme.GRADIENT
+):
+    """Removes a region of the image with seams that go through it
+
+    Vertical seams are used when the region is narrower than it is tall, horizontal seams otherwise,
+    so the number of seams (and the size lost) is the smaller of the two extents.
+
+    Args:
+        image (np.array): original image n by m by 3
+        remove (np.array): boolean n by m mask of the pixels to remove
+        protect (np.array, optional): boolean n by m mask of pixels to keep. Defaults to None.
+        colour_wts (np.array, optional): greyscale weights. Defaults to GREYSCALE_WT_DEFAULT.
+        energy (EnergyScheme | EnergyFunction | Callable, optional): energy function. Defaults to EnergyScheme.GRADIENT.
+
+    Returns:
+        np.array: the image without the region, narrower or shorter than the original
+    """
+    rows, cols = np.nonzero(remove)
+    if rows.size == 0:
+        return image.copy()
+    vertical = np.ptp(cols) <= np.ptp(rows)
+    magnitude = compute_energy(image, energy, colour_wts)
+    bias = region_bias(image.shape[:2], protect, remove)
+    mask = generate_mask(image.shape[0], image.shape[1])
+    while (remaining := remove[mask[..., 0], mask[..., 1]]).any():
+        # one seam per column (row) the region still spans is the least that can remove it
+        if vertical:
+            new_shape = (mask.shape[0], mask.shape[1] - np.count_nonzero(remaining.any(axis=0)))
+        else:
+            new_shape = (mask.shape[0] - np.count_nonzero(remaining.any(axis=1)), mask.shape[1])
+        *_, mask = get_seams(
+            image,
+            new_shape,
+            CarvingScheme.VERTICAL_HORIZONTAL,
+            colour_wts,
+            concat=False,
+            mask=mask,
+            energy=energy,
+            magnitude=magnitude,
+            bias=bias,
+        )
+    return image[mask[..., 0], mask[..., 1]]
@@ -0,0 +1,280 @@
+#! /usr/bin/python3
+# Python 3.10.X
+"""Long lived seam carving service for retargeting the same images to many sizes
+
+Seams are removed greedily one after the other, so carving an image to a smaller size is the same
+as carving it to a larger size first and continuing from there. The service keeps, for each image,
+its energy map and the masks reached by previous requests (checkpoints), and serves a request from
+the closest checkpoint it can continue from instead of starting from the raw image. Entries are
+kept in an LRU cache bounded in bytes, and requests run on a thread pool (the numba kernels
+release the GIL).
+"""
+
+import os
+import threading
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+
+from ex1.energy import EnergyScheme, compute_energy
+from ex1.seam_carving import (
+    GREYSCALE_WT_DEFAULT,
+    CarvingScheme,
+    carve_vertical_seams,
+    generate_mask,
+    get_seams,
+)
+
+MAX_BYTES_DEFAULT = 256 * 2**20
+
+
+def transpose_mask(mask):
+    """The mask of the transposed image, the (row, col) pairs become (col, row)"""
+    return np.flip(np.transpose(mask, (1, 0, 2)), axis=2)
+
+
+class _CarvingState:
+    """What is cached for one image: the image, its energy map and the checkpoint masks
+
+    Checkpoints are keyed by (scheme, mask shape). For the VERTICAL_HORIZONTAL and HORIZONTAL_VERTICAL
+    schemes the masks are stored in the orientation the scheme carves first vertically in (the
+    transposed image for HORIZONTAL_VERTICAL).
+    """
+
+    __slots__ = ("image", "magnitude", "checkpoints", "lock")
+
+    def __init__(self, image, magnitude):
+        self.image = image
+        self.magnitude = magnitude
+        self.checkpoints = OrderedDict()
+        self.lock = threading.Lock()
+
+    def nbytes(self):
+        """Size of the cached arrays, the caller holds lock"""
+        return (
+            self.image.nbytes
+            + self.magnitude.nbytes
+            + sum(mask.nbytes for mask in self.checkpoints.values())
+        )
+
+
+class SeamCarvingService:
+    """Retargets images given by id, reusing the carving state of earlier requests
+
+    Args:
+        loader (Callable[[Hashable], np.array]): returns the n by m by 3 image of an id, called on cache misses
+        max_bytes (int, optional): memory cap of the cached images, energy maps and masks. Defaults to MAX_BYTES_DEFAULT.
+        workers (int, optional): number of requests served in parallel. Defaults to the number of processors.
+        colour_wts (np.array, optional): greyscale weights. Defaults to GREYSCALE_WT_DEFAULT.
+        energy (EnergyScheme | EnergyFunction | Callable, optional): energy function. Defaults to EnergyScheme.GRADIENT.
+        compact (bool, optional): use the compact float32 / int8 / int32 pipeline. Defaults to False.
+        max_checkpoints (int, optional): masks kept per image and scheme, the least recently used are dropped. Defaults to 8.
+    """
+
+    def __init__(
+        self,
+        loader,
+        max_bytes=MAX_BYTES_DEFAULT,
+        workers=None,
+        colour_wts=GREYSCALE_WT_DEFAULT,
+        energy=EnergyScheme.GRADIENT,
+        compact=False,
+        max_checkpoints=8,
+    ):
+        self.loader = loader
+        self.max_bytes = max_bytes
+        self.colour_wts = colour_wts
+        self.energy = energy
+        self.compact = compact
+        self.max_checkpoints = max_checkpoints
+        self._executor = ThreadPoolExecutor(max_workers=workers or os.cpu_count() or 1)
+        self._entries = OrderedDict()
+        self._sizes = {}
+        self._lock = threading.Lock()
+        self._stats = dict.fromkeys(
+            (
+                "requests",
+                "hits",
+                "misses",
+                "checkpoint_hits",
+                "evictions",
+                "checkpoint_evictions",
+                "seams_carved",
+                "seams_reused",
+            ), 0
+        )
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def close(self):
+        self._executor.shutdown()
+
+    def submit(self, image_id, new_shape, carving_scheme=CarvingScheme.VERTICAL_HORIZONTAL):
+        """Queues a request on the thread pool
+
+        Returns:
+            concurrent.futures.Future: resolves to the retargeted image
+        """
+        return self._executor.submit(self.retarget, image_id, new_shape, carving_scheme)
+
+    def retarget(self, image_id, new_shape, carving_scheme=CarvingScheme.VERTICAL_HORIZONTAL):
+        """Resizes the image of image_id to new_shape in the calling thread
+
+        Args:
+            image_id (Hashable): id of the image, passed to the loader on a cache miss
+            new_shape (Tuple[int, int]): desired image shape
+            carving_scheme (CarvingScheme, optional): carving scheme. Defaults to VERTICAL_HORIZONTAL.
+
+        Returns:
+            np.array: the image resized to new_shape
+        """
+        state = self._state(image_id)
+        with state.lock:
+            if new_shape[0] > state.image.shape[0] or new_shape[1] > state.image.shape[1]:
+                raise ValueError("Supports only seam removal")
+            if new_shape[0] <= 0 or new_shape[1] <= 0:
+                raise ValueError("New image cannot be empty")
+            if carving_scheme == CarvingScheme.INTERMITTENT:
+                # the scheme alternates directions, only the energy map is reused
+                *_, mask = get_seams(
+                    state.image,
+                    new_shape,
+                    carving_scheme,
+                    self.colour_wts,
+                    concat=False,
+                    energy=self.energy,
+                    magnitude=state.magnitude,
+                    compact=self.compact,
+                )
+                self._count("seams_carved", sum(state.image.shape[:2]) - sum(new_shape))
+                result = state.image[mask[..., 0], mask[..., 1]]
+            else:
+                result = self._carve(state, tuple(new_shape), carving_scheme)
+        self._resize(image_id, state)
+        return result
+
+    def _carve(self, state, new_shape, carving_scheme):
+        """Carves vertical then horizontal seams in the orientation of the scheme, from the best checkpoint"""
+        image, magnitude = state.image, state.magnitude
+        if carving_scheme == CarvingScheme.HORIZONTAL_VERTICAL:
+            image, magnitude = np.transpose(image, (1, 0, 2)), magnitude.T
+            new_shape = new_shape[::-1]
+        height, width = new_shape
+        mask = self._checkpoint(state, carving_scheme, magnitude.shape, new_shape)
+        reused = sum(magnitude.shape) - sum(mask.shape[:2])
+        if mask.shape[1] > width:
+            mask, _ = carve_vertical_seams(magnitude, (magnitude.shape[0], width), mask, compact=self.compact)
+            self._remember(state, carving_scheme, mask)
+        if mask.shape[0] > height:
+            mask_T, _ = carve_vertical_seams(
+                magnitude.T, (width, height), transpose_mask(mask), compact=self.compact
+            )
+            mask = transpose_mask(mask_T)
+            self._remember(state, carving_scheme, mask)
+        self._count("seams_reused", reused)
+        self._count("seams_carved", sum(magnitude.shape) - sum(new_shape) - reused)
+        result = image[mask[..., 0], mask[..., 1]]
+        if carving_scheme == CarvingScheme.HORIZONTAL_VERTICAL:
+            result = np.transpose(result, (1, 0, 2))
+        return result
+
+    def _checkpoint(self, state, carving_scheme, full_shape, new_shape):
+        """The cached mask closest to new_shape that carving can continue from, a full mask if none"""
+        height, width = new_shape
+        best = None
+        for (scheme, (rows, cols)), mask in state.checkpoints.items():
+            if scheme != carving_scheme:
+                continue
+            # same width: only horizontal seams are left to remove; full height: vertical ones may be
+            if (cols == width and rows >= height) or (rows == full_shape[0] and cols >= width):
+                if best is None or rows + cols < sum(best.shape[:2]):
+                    best = mask
+        if best is None:
+            return generate_mask(*full_shape, np.int32 if self.compact else np.int64)
+        self._count("checkpoint_hits")
+        state.checkpoints.move_to_end((carving_scheme, best.shape[:2]))
+        return best
+
+    def _remember(self, state, carving_scheme, mask):
+        state.checkpoints[(carving_scheme, mask.shape[:2])] = mask
+        state.checkpoints.move_to_end((carving_scheme, mask.shape[:2]))
+        ours = [key for key in state.checkpoints if key[0] == carving_scheme]
+        for key in ours[: max(len(ours) - self.max_checkpoints, 0)]:
+            del state.checkpoints[key]
+
+    def _state(self, image_id):
+        with self._lock:
+            self._stats["requests"] += 1
+            state = self._entries.get(image_id)
+            if state is not None:
+                self._stats["hits"] += 1
+                self._entries.move_to_end(image_id)
+                return state
+            self._stats["misses"] += 1
+        # loading and the energy are computed outside of the lock, a concurrent miss on the same
+        # image may compute them twice and the last one is kept
+        image = np.asarray(self.loader(image_id))
+        magnitude = compute_energy(image, self.energy, self.colour_wts)
+        if self.compact:
+            magnitude = magnitude.astype(np.float32, copy=False)
+        state = _CarvingState(image, magnitude)
+        with self._lock:
+            state = self._entries.setdefault(image_id, state)
+        self._resize(image_id, state)
+        return state
+
+    def _resize(self, image_id, state):
+        """Updates the size of an entry and evicts the least recently used ones above max_bytes
+
+        When a single entry is left above max_bytes, its least recently used checkpoints are
+        dropped instead. The state lock is never taken while holding the service lock.
+        """
+        with state.lock:
+            size = state.nbytes()
+        with self._lock:
+            if self._entries.get(image_id) is not state:
+                return
+            self._sizes[image_id] = size
+            total = sum(self._sizes.values())
+            while total > self.max_bytes and len(self._entries) > 1:
+                evicted, _ = self._entries.popitem(last=False)
+                total -= self._sizes.pop(evicted)
+                self._stats["evictions"] += 1
+            if total <= self.max_bytes:
+                return
+            image_id, state = next(iter(self._entries.items()))
+        with state.lock:
+            while state.checkpoints and state.nbytes() > self.max_bytes:
+                state.checkpoints.popitem(last=False)
+                self._count("checkpoint_evictions")
+            size = state.nbytes()
+        with self._lock:
+            if self._entries.get(image_id) is state:
+                self._sizes[image_id] = size
+
+    def _count(self, name, n=1):
+        with self._lock:
+            self._stats[name] += n
+
+    def invalidate(self, image_id):
+        """Drops the cached state of an image, e.g. after it changed"""
+        with self._lock:
+            self._entries.pop(image_id, None)
+            self._sizes.pop(image_id, None)
+
+    def stats(self):
+        """Snapshot of the counters, with the number of cached images and their size in bytes
+
+        Returns:
+            dict: requests, hits and misses of the image cache, checkpoint_hits (requests continued
+            from a cached mask), evictions, checkpoint_evictions (masks dropped to keep a single
+            image under max_bytes), seams_carved and seams_reused (seams skipped thanks to
+            checkpoints), entries and bytes
+        """
+        with self._lock:
+            return dict(self._stats, entries=len(self._entries), bytes=sum(self._sizes.values()))
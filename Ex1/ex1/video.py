@@ -0,0 +1,130 @@
+#! /usr/bin/python3
+# Python 3.10.X
+"""Video retargeting with temporally coherent seams
+
+The seams of each frame are searched in a band around the seams of the previous frame, which keeps
+them from jittering and restricts the dynamic programming to the band. The chain of guides runs
+through the whole clip, so the frames are carved one after the other; the energy maps of the next
+groups of frames are computed ahead on a thread pool meanwhile.
+"""
+
+import os
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from itertools import islice
+
+from ex1.energy import EnergyScheme, compute_energy
+from ex1.seam_carving import GREYSCALE_WT_DEFAULT, CarvingScheme, get_seams
+
+READ_AHEAD_GROUPS = 2  # groups read and queued for the energy workers ahead of the one being carved
+
+
+def _carve_frames(frames, magnitudes, new_shape, carving_scheme, colour_wts, band, guide, compact=False):
+    """Carves frames with their energy maps, each one guided by the seams of the previous one
+
+    Returns:
+        Tuple[List[np.array], Tuple[List[np.array], List[np.array]]]: the carved frames and the
+        seams of the last one, the guide of the frame that follows
+    """
+    if carving_scheme == CarvingScheme.INTERMITTENT:
+        raise ValueError("Video carving supports the VERTICAL_HORIZONTAL and HORIZONTAL_VERTICAL schemes")
+    carved = []
+    for frame, magnitude in zip(frames, magnitudes):
+        seams_vertical, seams_horizontal, mask = get_seams(
+            frame,
+            new_shape,
+            carving_scheme,
+            colour_wts,
+            concat=False,
+            magnitude=magnitude,
+            guide=guide,
+            band=band,
+            compact=compact,
+        )
+        guide = (seams_vertical, seams_horizontal)
+        carved.append(frame[mask[..., 0], mask[..., 1]])
+    return carved, guide
+
+
+def _energies(frames, energy, colour_wts):
+    return [compute_energy(frame, energy, colour_wts) for frame in frames]
+
+
+def carve_group(
+    frames,
+    new_shape,
+    carving_scheme=CarvingScheme.VERTICAL_HORIZONTAL,
+    colour_wts=GREYSCALE_WT_DEFAULT,
+    energy=EnergyScheme.GRADIENT,
+    band=3,
+    guide=None,
+    compact=False,
+):
+    """Carves consecutive frames, each one guided by the seams of the previous one
+
+    Args:
+        frames (List[np.array]): frames of the same shape - n by m by 3
+        new_shape (Tuple[int, int]): desired frame shape
+        carving_scheme (CarvingScheme, optional): VERTICAL_HORIZONTAL or HORIZONTAL_VERTICAL. Defaults to VERTICAL_HORIZONTAL.
+        colour_wts (np.array, optional): greyscale weights. Defaults to GREYSCALE_WT_DEFAULT.
+        energy (EnergyScheme | EnergyFunction | Callable, optional): energy function. Defaults to EnergyScheme.GRADIENT.
+        band (int, optional): how far (in pixels) a seam may move from one frame to the next. Defaults to 3.
+        guide (Tuple[List[np.array], List[np.array]], optional): vertical and horizontal seams of the
+            frame before the first one, which is carved unguided when None. Defaults to None.
+        compact (bool, optional): use the compact float32 / int8 / int32 pipeline, see get_seams. Defaults to False.
+
+    Returns:
+        List[np.array]: the carved frames
+    """
+    magnitudes = _energies(frames, energy, colour_wts)
+    return _carve_frames(frames, magnitudes, new_shape, carving_scheme, colour_wts, band, guide, compact)[0]
+
+
+def carve_video(
+    frames,
+    new_shape,
+    carving_scheme=CarvingScheme.VERTICAL_HORIZONTAL,
+    colour_wts=GREYSCALE_WT_DEFAULT,
+    energy=EnergyScheme.GRADIENT,
+    band=3,
+    group_size=8,
+    workers=None,
+    compact=False,
+):
+    """Retargets a stream of frames, yielding the carved frames in order
+
+    Frames are read in groups of group_size and the energy maps of at most READ_AHEAD_GROUPS groups
+    are computed ahead, so the memory use depends neither on the length of the clip nor on the
+    number of workers (each group is split between them). Only the first
+    frame of the clip is carved without a guide, the first frame of each group is guided by the
+    last frame of the group before.
+
+    Args:
+        frames (Iterable[np.array]): the frames, e.g. a generator reading them from a file
+        new_shape (Tuple[int, int]): desired frame shape
+        carving_scheme (CarvingScheme, optional): VERTICAL_HORIZONTAL or HORIZONTAL_VERTICAL. Defaults to VERTICAL_HORIZONTAL.
+        colour_wts (np.array, optional): greyscale weights. Defaults to GREYSCALE_WT_DEFAULT.
+        energy (EnergyScheme | EnergyFunction | Callable, optional): energy function. Defaults to EnergyScheme.GRADIENT.
+        band (int, optional): how far (in pixels) a seam may move from one frame to the next. Defaults to 3.
+        group_size (int, optional): frames read and given to an energy worker at once. Defaults to 8.
+        workers (int, optional): threads computing the energy maps. Defaults to the number of processors.
+        compact (bool, optional): use the compact float32 / int8 / int32 pipeline, see get_seams. Defaults to False.
+
+    Yields:
+        np.array: the carved frames
+    """
+    frames = iter(frames)
+    workers = workers or os.cpu_count() or 1
+    guide = None
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        pending = deque()
+        while True:
+            while len(pending) < READ_AHEAD_GROUPS and (group := list(islice(frames, group_size))):
+                pending.append((group, [executor.submit(compute_energy, frame, energy, colour_wts) for frame in group]))
+            if not pending:
+                return
+            group, magnitudes = pending.popleft()
+            carved, guide = _carve_frames(
+                group, [m.result() for m in magnitudes], new_shape, carving_scheme, colour_wts, band, guide, compact
+            )
+            yield from carved
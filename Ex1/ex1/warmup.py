@@ -0,0 +1,86 @@
+#! /usr/bin/python3
+# Python 3.10.X
+"""Ahead-of-time warm-up of the numba kernels used by seam carving.
+
+Running ``python -m ex1.warmup [--cache-dir DIR]`` once (e.g. at install or image
+build time) compiles every kernel for the signatures the carving schemes use and
+stores them in numba's on-disk cache, so later processes only load them.
+"""
+
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+
+CACHE_DIR_ENV = "NUMBA_CACHE_DIR"
+WARMUP_SHAPE = (12, 16, 3)
+WARMUP_TARGET = (9, 11)
+
+
+def set_cache_dir(cache_dir):
+    """Points numba at a shared cache directory
+
+    Must be called before numba is imported (the kernels import it lazily on their
+    first call), numba reads the cache location when it is imported.
+
+    Args:
+        cache_dir (str): directory shared by all the processes using the kernels
+
+    Raises:
+        RuntimeError: if numba was already imported with another cache directory
+    """
+    cache_dir = os.path.abspath(cache_dir)
+    if "numba" in sys.modules and os.environ.get(CACHE_DIR_ENV) != cache_dir:
+        raise RuntimeError("The cache directory must be set before numba is imported")
+    os.makedirs(cache_dir, exist_ok=True)
+    os.environ[CACHE_DIR_ENV] = cache_dir
+
+
+def warmup(cache_dir=None):
+    """Compiles (or loads from the cache) the kernels for all the carving schemes
+
+    The kernels are specialised on the array layouts too (the horizontal pass works on
+    transposed views), so a small image is carved with every scheme, in the default and the
+    compact pipeline, instead of compiling a fixed list of signatures. The default pipeline is
+    carved with a float64 (EnergyScheme.GRADIENT) and a float32 (every other energy) energy map. The guided search of
+    video carving is warmed up by carving the image again guided by its own seams.
+
+    Args:
+        cache_dir (str, optional): shared numba cache directory. Defaults to numba's default.
+
+    Returns:
+        Dict[str, float]: seconds spent importing the module and compiling the kernels
+    """
+    if cache_dir is not None:
+        set_cache_dir(cache_dir)
+    start = time.perf_counter()
+    from ex1 import seam_carving
+    from ex1.energy import EnergyScheme
+
+    imported = time.perf_counter()
+    image = np.random.default_rng(0).integers(0, 256, WARMUP_SHAPE, dtype=np.uint8)
+    guided = (seam_carving.CarvingScheme.VERTICAL_HORIZONTAL, seam_carving.CarvingScheme.HORIZONTAL_VERTICAL)
+    for compact in (False, True):
+        for scheme in seam_carving.CarvingScheme:
+            seam_carving.reshape_seam_carving(image, WARMUP_TARGET, scheme, compact=compact)
+            if not compact:  # the other energies give float32 maps, a signature of their own
+                seam_carving.reshape_seam_carving(image, WARMUP_TARGET, scheme, energy=EnergyScheme.GRADIENT_FLOAT32)
+        for scheme in guided:
+            *guide, _ = seam_carving.get_seams(image, WARMUP_TARGET, scheme, concat=False, compact=compact)
+            seam_carving.get_seams(image, WARMUP_TARGET, scheme, concat=False, guide=guide, compact=compact)
+    compiled = time.perf_counter()
+    return {"import": imported - start, "compile": compiled - imported, "total": compiled - start}
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Compile the seam carving kernels into the numba cache")
+    parser.add_argument("--cache-dir", help=f"shared cache directory (sets {CACHE_DIR_ENV})")
+    args = parser.parse_args(argv)
+    timings = warmup(args.cache_dir)
+    print(" ".join(f"{name}={seconds:.3f}s" for name, seconds in timings.items()))
+
+
+if __name__ == "__main__":
+    main()
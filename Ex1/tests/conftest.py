@@ -0,0 +1,5 @@
+import os
+import sys
+
+# the ex1 package is used from the exercise directory, it is not installed
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
@@ -0,0 +1,52 @@
+import os
+
+import numpy as np
+import pytest
+
+from ex1 import seam_carving as sc
+from ex1.energy import EnergyScheme, compute_energy, energy_greyscale, get_energy_function, update_energy_strip
+
+# outputs of the original implementation of the exercise on a 24 by 32 image carved to 19 by 25
+BASELINE = os.path.join(os.path.dirname(__file__), "data", "seam_carving_baseline.npz")
+NEW_SHAPE = (19, 25)
+
+
+@pytest.fixture(scope="module")
+def baseline():
+    return np.load(BASELINE)
+
+
+def test_gradient_magnitude_matches_baseline(baseline):
+    magnitude = sc.gradient_magnitude(baseline["image"])
+    assert magnitude.dtype == np.float64
+    np.testing.assert_array_equal(magnitude, baseline["gradient"])
+
+
+@pytest.mark.parametrize("scheme", list(sc.CarvingScheme))
+def test_default_carving_matches_baseline(baseline, scheme):
+    carved = sc.reshape_seam_carving(baseline["image"], NEW_SHAPE, scheme)
+    np.testing.assert_array_equal(carved, baseline[scheme.name])
+
+
+@pytest.mark.parametrize("energy", [e for e in EnergyScheme if e != EnergyScheme.GRADIENT])
+def test_opt_in_energies_are_float32(baseline, energy):
+    assert compute_energy(baseline["image"], energy).dtype == np.float32
+    carved = sc.reshape_seam_carving(baseline["image"], NEW_SHAPE, sc.CarvingScheme.VERTICAL_HORIZONTAL, energy=energy)
+    assert carved.shape == (*NEW_SHAPE, 3)
+
+
+@pytest.mark.parametrize("energy", list(EnergyScheme))
+def test_energy_strip_matches_a_full_recompute(baseline, energy):
+    image = baseline["image"][:, :12]
+    greyscale = energy_greyscale(image, energy)
+    func = get_energy_function(energy).func
+    magnitude = func(greyscale)
+    mask = sc.generate_mask(*greyscale.shape)
+    rng = np.random.default_rng(0)
+    while mask.shape[1] > 4:  # down to the 8 column wide maps that once took the wrong values
+        columns = np.clip(rng.integers(-1, 2, len(mask)).cumsum() + mask.shape[1] // 2, 0, mask.shape[1] - 1)
+        masked_seam = np.stack([np.arange(len(mask)), columns], axis=1)
+        mask = sc.remove_seams_from_mask(masked_seam, mask)
+        update_energy_strip(magnitude, greyscale, mask, masked_seam, energy)
+        expected = func(np.ascontiguousarray(greyscale[mask[..., 0], mask[..., 1]]))
+        np.testing.assert_allclose(magnitude[mask[..., 0], mask[..., 1]], expected, rtol=1e-5, atol=1e-5)
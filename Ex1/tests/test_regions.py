@@ -0,0 +1,60 @@
+import numpy as np
+import pytest
+
+from ex1 import seam_carving as sc
+
+MAGENTA = np.array([255, 0, 255], dtype=np.uint8)
+CYAN = np.array([0, 255, 255], dtype=np.uint8)
+
+
+def painted_image(remove=None, protect=None, shape=(30, 40)):
+    image = np.random.default_rng(3).integers(0, 200, (*shape, 3), dtype=np.uint8)
+    for region, colour in ((remove, MAGENTA), (protect, CYAN)):
+        if region is not None:
+            image[region] = colour
+    return image
+
+
+def count(image, colour):
+    return np.count_nonzero((image == colour).all(axis=-1))
+
+
+def region(rows, cols, shape=(30, 40)):
+    mask = np.zeros(shape, dtype=bool)
+    mask[rows, cols] = True
+    return mask
+
+
+@pytest.mark.parametrize(
+    "remove, carved_axis",
+    [(region(slice(5, 25), slice(10, 14)), 1), (region(slice(12, 16), slice(5, 35)), 0)],
+    ids=["vertical", "horizontal"],
+)
+def test_remove_object_keeps_the_protected_region(remove, carved_axis):
+    protect = region(slice(2, 28), slice(20, 23)) if carved_axis else region(slice(20, 23), slice(2, 38))
+    image = painted_image(remove, protect)
+    carved = sc.remove_object(image, remove, protect)
+    assert count(carved, MAGENTA) == 0
+    assert count(carved, CYAN) == np.count_nonzero(protect)
+    assert carved.shape[1 - carved_axis] == image.shape[1 - carved_axis]
+    assert carved.shape[carved_axis] < image.shape[carved_axis]
+
+
+@pytest.mark.parametrize("compact", [False, True])
+@pytest.mark.parametrize("scheme", [sc.CarvingScheme.VERTICAL_HORIZONTAL, sc.CarvingScheme.HORIZONTAL_VERTICAL])
+def test_reshape_with_regions(scheme, compact):
+    remove = region(slice(10, 14), slice(10, 14))
+    protect = region(slice(18, 24), slice(22, 30))  # seams of both directions can go around it
+    image = painted_image(remove, protect)
+    carved = sc.reshape_seam_carving(image, (26, 32), scheme, protect=protect, remove=remove, compact=compact)
+    assert carved.shape == (26, 32, 3)
+    assert count(carved, MAGENTA) == 0
+    assert count(carved, CYAN) == np.count_nonzero(protect)
+
+
+def test_compact_region_weight_outweighs_any_seam():
+    magnitude = np.full((30, 40), 360.5, dtype=np.float32)
+    weight = sc.compact_region_weight(magnitude)
+    assert weight > 3 * 360.5 * 40
+    assert weight < sc.PROTECT_ENERGY
+    assert np.float32(weight) == weight
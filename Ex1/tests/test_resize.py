@@ -0,0 +1,24 @@
+import numpy as np
+import pytest
+
+from ex1 import seam_carving as sc
+from ex1.resize import resize_bilinear
+
+
+@pytest.mark.parametrize("new_shape", [(17, 45), (61, 23), (40, 40)])
+@pytest.mark.parametrize("workers", [0, 3])
+def test_resize_bilinear_matches_reshape_bilinear(new_shape, workers):
+    image = np.random.default_rng(5).integers(0, 256, (40, 32, 3), dtype=np.uint8)
+    resized = resize_bilinear(image, new_shape, tile_rows=7, workers=workers)
+    expected = sc.reshape_bilinear(image, new_shape)
+    assert resized.shape == expected.shape and resized.dtype == np.uint8
+    assert np.abs(resized.astype(int) - expected).max() <= 1
+
+
+def test_resize_bilinear_into_a_memory_mapped_file(tmp_path):
+    image = np.random.default_rng(6).integers(0, 256, (30, 20, 3), dtype=np.uint8)
+    out = np.lib.format.open_memmap(str(tmp_path / "out.npy"), mode="w+", dtype=np.uint8, shape=(45, 50, 3))
+    resize_bilinear(image, (45, 50), out=out)
+    out.flush()
+    expected = sc.reshape_bilinear(image, (45, 50))
+    assert np.abs(np.load(tmp_path / "out.npy").astype(int) - expected).max() <= 1
@@ -0,0 +1,47 @@
+import numpy as np
+
+from ex1 import seam_carving as sc
+from ex1.service import SeamCarvingService
+
+SHAPE = (24, 32, 3)
+TARGETS = [(22, 30), (20, 28), (18, 26), (16, 24)]
+
+
+def load(image_id):
+    return np.random.default_rng(image_id).integers(0, 256, SHAPE, dtype=np.uint8)
+
+
+def state_bytes():
+    image = load(0)
+    return image.nbytes + np.zeros(SHAPE[:2]).nbytes  # image and float64 energy
+
+
+def test_results_match_reshape_seam_carving():
+    with SeamCarvingService(load, workers=2) as service:
+        futures = [service.submit(image_id, target) for image_id in range(2) for target in TARGETS]
+        results = [future.result() for future in futures]
+    expected = [sc.reshape_seam_carving(load(image_id), target, sc.CarvingScheme.VERTICAL_HORIZONTAL)
+                for image_id in range(2) for target in TARGETS]
+    for result, reference in zip(results, expected):
+        np.testing.assert_array_equal(result, reference)
+
+
+def test_single_entry_stays_under_max_bytes():
+    max_bytes = state_bytes() + np.zeros((24, 31, 2), dtype=np.int64).nbytes  # room for one checkpoint
+    with SeamCarvingService(load, max_bytes=max_bytes, workers=1) as service:
+        for target in TARGETS:
+            np.testing.assert_array_equal(
+                service.retarget(0, target), sc.reshape_seam_carving(load(0), target, sc.CarvingScheme.VERTICAL_HORIZONTAL)
+            )
+        stats = service.stats()
+    assert stats["entries"] == 1
+    assert stats["bytes"] <= max_bytes
+    assert stats["checkpoint_evictions"] > 0
+
+
+def test_entries_hold_no_bias_map():
+    with SeamCarvingService(load, workers=1) as service:
+        result = service.retarget(0, TARGETS[0], sc.CarvingScheme.INTERMITTENT)  # keeps no checkpoint
+        stats = service.stats()
+    np.testing.assert_array_equal(result, sc.reshape_seam_carving(load(0), TARGETS[0], sc.CarvingScheme.INTERMITTENT))
+    assert stats["bytes"] == state_bytes()
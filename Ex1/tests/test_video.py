@@ -0,0 +1,53 @@
+import numpy as np
+import pytest
+
+from ex1 import seam_carving as sc
+from ex1.video import carve_group, carve_video
+
+
+def panning_clip(frames=6, shape=(20, 40)):
+    rng = np.random.default_rng(37)
+    scene = rng.integers(0, 256, (shape[0], shape[1] + frames, 3), dtype=np.uint8)
+    return [scene[:, i : i + shape[1]] for i in range(frames)]
+
+
+@pytest.mark.parametrize("compact", [False, True])
+def test_discontinuous_guide(compact):
+    image = np.random.default_rng(1).integers(0, 256, (20, 50, 3), dtype=np.uint8)
+    rows = np.arange(20)
+    guide = np.stack([rows, np.where(rows < 10, 2, 40)], axis=1)  # jumps by 38 columns
+    seams, _, mask = sc.get_seams(
+        image, (20, 49), sc.CarvingScheme.VERTICAL_HORIZONTAL, concat=False, guide=([guide], []), band=3, compact=compact
+    )
+    assert mask.shape == (20, 49, 2)
+    assert np.abs(np.diff(seams[0][:, 1])).max() <= 1
+    assert np.abs(seams[0][:10, 1] - 2).max() <= 3  # follows the guide before the jump
+
+
+@pytest.mark.parametrize("scheme", [sc.CarvingScheme.VERTICAL_HORIZONTAL, sc.CarvingScheme.HORIZONTAL_VERTICAL])
+def test_guides_carry_across_groups(scheme):
+    frames = panning_clip()
+    expected = carve_group(frames, (17, 33), scheme)
+    carved = list(carve_video(iter(frames), (17, 33), scheme, group_size=2, workers=2))
+    assert len(carved) == len(expected)
+    for a, b in zip(carved, expected):
+        np.testing.assert_array_equal(a, b)
+
+
+def test_read_ahead_does_not_grow_with_the_workers():
+    frames = panning_clip(frames=12)
+    read = 0
+
+    def reader():
+        nonlocal read
+        for frame in frames:
+            read += 1
+            yield frame
+
+    stream = carve_video(reader(), (20, 38), group_size=2, workers=16, compact=True)
+    first = next(stream)
+    assert read <= 2 * 2
+    expected = carve_group(frames, (20, 38), compact=True)
+    np.testing.assert_array_equal(first, expected[0])
+    for a, b in zip(stream, expected[1:]):
+        np.testing.assert_array_equal(a, b)
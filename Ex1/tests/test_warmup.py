@@ -0,0 +1,29 @@
+import os
+import subprocess
+import sys
+
+import pytest
+
+from ex1 import seam_carving
+from ex1.warmup import warmup
+
+pytest.importorskip("numba")
+
+KERNELS = ("calc_cost", "traceback", "calc_cost_compact", "traceback_compact", "guide_band")
+EX1_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def test_warmup_compiles_every_kernel():
+    warmup()
+    for name in KERNELS:
+        assert getattr(seam_carving, name).dispatcher.signatures, name
+    magnitudes = {str(signature[0].dtype) for signature in seam_carving.calc_cost.dispatcher.signatures}
+    assert {"float32", "float64"} <= magnitudes
+
+
+def test_warmup_fills_the_cache(tmp_path):
+    cache_dir = tmp_path / "numba"
+    subprocess.run([sys.executable, "-m", "ex1.warmup", "--cache-dir", str(cache_dir)], cwd=EX1_DIR, check=True)
+    cached = [name for _, _, files in os.walk(cache_dir) for name in files if name.endswith(".nbi")]
+    for name in KERNELS:
+        assert any(f.startswith(f"seam_carving.{name}-") for f in cached), name
@@ -0,0 +1,269 @@
+from typing import List, Sequence
+
+from helper_classes import *
+
+
+# ray_box_entry for (N, 3) arrays of rays, returns a boolean array of the rays entering the box
+def rays_enter_box(origins, inv_directions, lo, hi, t_max):
+    return box_entries(origins, inv_directions, lo, hi, t_max) != np.inf
+
+
+class BVHNode:
+    __slots__ = ("lo", "hi", "left", "right", "objects")
+
+    def __init__(self, objects, left=None, right=None):
+        self.objects = objects  # the objects of a leaf, None for inner nodes
+        self.left = left
+        self.right = right
+        self.refit()
+
+    def refit(self):
+        if self.objects is None:
+            self.left.refit()
+            self.right.refit()
+            self.lo = np.minimum(self.left.lo, self.right.lo)
+            self.hi = np.maximum(self.left.hi, self.right.hi)
+        else:
+            lows, highs = zip(*(obj.bounds() for obj in self.objects))
+            self.lo, self.hi = np.min(lows, axis=0), np.max(highs, axis=0)
+
+
+# Bounding volume hierarchy over bounded objects. It is used as a single scene object:
+# intersect returns the nearest hit of its objects like Ray.nearest_intersected_object.
+# Moving objects only requires refit, which keeps the tree and recomputes the boxes.
+class BVH:
+    __slots__ = ("root", "objects", "leaf_size")
+
+    def __init__(self, objects: Sequence[Object3D], leaf_size: int = 4):
+        if not objects:
+            raise ValueError("A BVH needs at least one object")
+        if any(obj.bounds() is None for obj in objects):
+            raise ValueError("Unbounded objects (planes) cannot be put in a BVH")
+        self.objects = list(objects)
+        self.leaf_size = leaf_size
+        self.root = self._build(self.objects)
+
+    # Median split on the longest axis of the box of the object centers
+    def _build(self, objects):
+        if len(objects) <= self.leaf_size:
+            return BVHNode(objects)
+        centers = np.array([np.add(*obj.bounds()) / 2 for obj in objects])
+        axis = np.argmax(centers.max(axis=0) - centers.min(axis=0))
+        order = np.argsort(centers[:, axis], kind="stable")
+        half = len(objects) // 2
+        left = [objects[i] for i in order[:half]]
+        right = [objects[i] for i in order[half:]]
+        return BVHNode(None, self._build(left), self._build(right))
+
+    def refit(self):
+        self.root.refit()
+
+    def compile(self, dtype=np.float64):
+        for obj in self.objects:
+            obj.compile(dtype)
+        self.refit()
+
+    def bounds(self):
+        return self.root.lo, self.root.hi
+
+    def intersect(self, ray: Ray):
+        inv_direction = inverse_direction(ray.direction)
+        nearest_object = None
+        min_distance = np.inf
+        stack = [self.root]
+        while stack:
+            node = stack.pop()
+            if ray_box_entry(ray.origin, inv_direction, node.lo, node.hi, min_distance) is None:
+                continue
+            if node.objects is None:
+                stack.append(node.left)
+                stack.append(node.right)
+                continue
+            for obj in node.objects:
+                dist_obj, component = obj.intersect(ray)
+                if component is not None and dist_obj < min_distance:
+                    nearest_object = component
+                    min_distance = dist_obj
+        return min_distance, nearest_object
+
+    # Packet traversal: each node is tested against all the rays that reached it at once and the
+    # leaves intersect their objects with intersect_batch. Coherent rays share most nodes.
+    def intersect_batch(self, origins, directions):
+        inv_directions = inverse_direction(directions)
+        min_distance = np.full(len(origins), np.inf, dtype=origins.dtype)
+        nearest_object = np.full(len(origins), None, dtype=object)
+        stack = [(self.root, np.arange(len(origins)))]
+        while stack:
+            node, rays = stack.pop()
+            rays = rays[rays_enter_box(origins[rays], inv_directions[rays], node.lo, node.hi, min_distance[rays])]
+            if not len(rays):
+                continue
+            if node.objects is None:
+                stack.append((node.left, rays))
+                stack.append((node.right, rays))
+                continue
+            dist, components = nearest_intersected_batch(node.objects, origins[rays], directions[rays])
+            closer = dist < min_distance[rays]
+            min_distance[rays[closer]] = dist[closer]
+            nearest_object[rays[closer]] = components[closer]
+        return min_distance, nearest_object
+
+
+# Uniform grid over bounded objects, for dense and evenly spread scenes (particles, many small
+# spheres). Only the non-empty cells are stored, in a dict keyed by the cell coordinates, and a
+# ray visits the cells it crosses in order (3D-DDA), stopping at the first cell holding a hit.
+class UniformGrid:
+    __slots__ = ("objects", "density", "max_resolution", "lo", "hi", "resolution", "cell_size", "cells")
+
+    # resolution is the number of cells per axis, chosen from the object count when None so
+    # that there are about density cells per object
+    def __init__(self, objects: Sequence[Object3D], resolution=None, density: float = 2.0, max_resolution: int = 256):
+        if not objects:
+            raise ValueError("A grid needs at least one object")
+        if any(obj.bounds() is None for obj in objects):
+            raise ValueError("Unbounded objects (planes) cannot be put in a grid")
+        self.objects = list(objects)
+        self.density = density
+        self.max_resolution = max_resolution
+        self.resolution = resolution
+        self.build()
+
+    def build(self):
+        lows, highs = (np.array(b) for b in zip(*(obj.bounds() for obj in self.objects)))
+        self.lo, self.hi = lows.min(axis=0), highs.max(axis=0)
+        extent = np.maximum(self.hi - self.lo, EPSILON)
+        if self.resolution is None:
+            cells_per_unit = np.cbrt(self.density * len(self.objects) / np.prod(extent))
+            resolution = np.clip(np.ceil(extent * cells_per_unit), 1, self.max_resolution).astype(int)
+        else:
+            resolution = np.broadcast_to(np.asarray(self.resolution, dtype=int), 3)
+        self.cell_size = extent / resolution
+        self.cells = {}
+        last = resolution - 1
+        first_cells = np.clip(((lows - self.lo) / self.cell_size).astype(int), 0, last)
+        last_cells = np.clip(((highs - self.lo) / self.cell_size).astype(int), 0, last)
+        for obj, (x0, y0, z0), (x1, y1, z1) in zip(self.objects, first_cells, last_cells):
+            for x in range(x0, x1 + 1):
+                for y in range(y0, y1 + 1):
+                    for z in range(z0, z1 + 1):
+                        self.cells.setdefault((x, y, z), []).append(obj)
+        self.resolution = tuple(int(r) for r in resolution)
+
+    # Moved objects need a new grid, there is nothing to refit
+    def refit(self):
+        self.build()
+
+    def compile(self, dtype=np.float64):
+        for obj in self.objects:
+            obj.compile(dtype)
+        self.build()
+
+    def bounds(self):
+        return self.lo, self.hi
+
+    def intersect(self, ray: Ray):
+        inv_direction = inverse_direction(ray.direction)
+        t_enter = ray_box_entry(ray.origin, inv_direction, self.lo, self.hi)
+        if t_enter is None:
+            return None, None
+        start = ray.origin + max(t_enter, 0) * ray.direction
+        cell, step, t_next, t_delta = [], [], [], []
+        for axis in range(3):
+            c = min(max(int((start[axis] - self.lo[axis]) / self.cell_size[axis]), 0), self.resolution[axis] - 1)
+            d = ray.direction[axis]
+            cell.append(c)
+            step.append(1 if d > 0 else -1)
+            if d == 0:
+                t_next.append(np.inf)
+                t_delta.append(np.inf)
+            else:
+                boundary = self.lo[axis] + (c + (d > 0)) * self.cell_size[axis]
+                t_next.append((boundary - ray.origin[axis]) * inv_direction[axis])
+                t_delta.append(abs(self.cell_size[axis] * inv_direction[axis]))
+
+        nearest_object = None
+        min_distance = np.inf
+        tested = set()  # objects overlapping several cells are only intersected once per ray
+        while True:
+            for obj in self.cells.get(tuple(cell), ()):
+                if id(obj) in tested:
+                    continue
+                tested.add(id(obj))
+                dist_obj, component = obj.intersect(ray)
+                if component is not None and dist_obj < min_distance:
+                    nearest_object = component
+                    min_distance = dist_obj
+            axis = min(range(3), key=t_next.__getitem__)
+            if min_distance <= t_next[axis]:  # the hit is inside the cells visited so far
+                break
+            cell[axis] += step[axis]
+            if not 0 <= cell[axis] < self.resolution[axis]:
+                break
+            t_next[axis] += t_delta[axis]
+        return min_distance, nearest_object
+
+    # The cells are walked ray by ray
+    intersect_batch = Object3D.intersect_batch
+
+
+# Tests its objects in the order the ray enters their boxes and stops at the first box entered
+# beyond the nearest hit found so far. The boxes are all tested at once, which suits scenes of a
+# few large objects (meshes) where a BVH has little to prune.
+class EntryOrderedList:
+    __slots__ = ("objects", "lo", "hi")
+
+    def __init__(self, objects: Sequence[Object3D]):
+        if not objects:
+            raise ValueError("An entry ordered list needs at least one object")
+        if any(obj.bounds() is None for obj in objects):
+            raise ValueError("Unbounded objects (planes) cannot be ordered by entry distance")
+        self.objects = list(objects)
+        self.refit()
+
+    def refit(self):
+        lows, highs = zip(*(obj.bounds() for obj in self.objects))
+        self.lo, self.hi = np.array(lows), np.array(highs)
+
+    def compile(self, dtype=np.float64):
+        for obj in self.objects:
+            obj.compile(dtype)
+        self.refit()
+
+    def bounds(self):
+        return self.lo.min(axis=0), self.hi.max(axis=0)
+
+    def intersect(self, ray: Ray):
+        entries = box_entries(ray.origin, inverse_direction(ray.direction), self.lo, self.hi)
+        nearest_object = None
+        min_distance = np.inf
+        for i in np.argsort(entries, kind="stable"):
+            if entries[i] == np.inf or entries[i] > min_distance:  # the remaining boxes are missed or further
+                break
+            dist_obj, component = self.objects[i].intersect(ray)
+            if component is not None and dist_obj < min_distance:
+                nearest_object = component
+                min_distance = dist_obj
+        return min_distance, nearest_object
+
+    # The objects are ordered ray by ray
+    intersect_batch = Object3D.intersect_batch
+
+
+# Returns the list of objects to trace: one acceleration structure over the bounded objects
+# followed by the unbounded ones (planes), which are tested separately.
+# kind is "bvh", "grid" for dense uniformly distributed scenes, or "ordered" for a few large objects.
+def build_accelerator(objects: Sequence[Object3D], kind: str = "bvh", **options) -> List:
+    bounded = [obj for obj in objects if obj.bounds() is not None]
+    unbounded = [obj for obj in objects if obj.bounds() is None]
+    if not bounded:
+        return unbounded
+    match kind:
+        case "bvh":
+            structure = BVH(bounded, **options)
+        case "grid":
+            structure = UniformGrid(bounded, **options)
+        case "ordered":
+            structure = EntryOrderedList(bounded, **options)
+        case _:
+            raise ValueError(f"Unknown acceleration structure {kind!r}")
+    return [structure] + unbounded
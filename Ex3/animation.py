@@ -0,0 +1,101 @@
+import copy
+import os
+import pickle
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from typing import Callable, Dict, List, Optional, Sequence
+
+from acceleration import build_accelerator
+from hw3 import *
+from image_io import save_image
+
+_worker_state = {}
+
+
+# What a process renders the frames with: the compiled scene (with its accelerated objects),
+# the objects that move and their current offsets from their initial positions
+def _animation_state(scene: Scene, moved: List[Object3D]) -> dict:
+    return dict(scene=scene, moved=moved, offsets=[np.zeros(3) for _ in moved])
+
+
+def _init_worker(payload: bytes):
+    _worker_state.update(pickle.loads(payload))
+
+
+# Moves the objects of state to offsets and refits the structures that hold them
+def _pose(state: dict, offsets: List[np.ndarray]):
+    if not state["moved"]:
+        return
+    for i, (obj, offset) in enumerate(zip(state["moved"], offsets)):
+        obj.translate(offset - state["offsets"][i])
+        state["offsets"][i] = offset
+    for structure in state["scene"].objects:
+        if hasattr(structure, "refit"):
+            structure.refit()
+
+
+def _render_frame(
+    camera, offsets, screen_size, max_depth, render_model: RenderModel, path: str, state: Optional[dict] = None
+) -> str:
+    state = _worker_state if state is None else state
+    _pose(state, offsets)
+    scene = state["scene"]._replace(camera=frozen_vector(camera))
+    save_image(path, render_compiled_scene(scene, screen_size, max_depth, render_model))
+    return path
+
+
+# Renders one frame per camera position of camera_path and writes each to output_dir as soon as
+# it is done. transforms maps an object to a function frame -> offset of the object from its
+# initial position. The scene is compiled and its BVH built once; moved objects only refit it.
+# The objects are animated on copies, the caller's scene is left as it was.
+# Frames are rendered by a pool of worker processes (workers=0 renders in this process) with at
+# most max_pending frames in flight, so the memory use does not grow with the sequence length.
+# The scene is sent once to each worker, a frame only sends its camera and offsets.
+# Returns the paths of the frames in order.
+def render_sequence(
+    camera_path: Sequence,
+    ambient,
+    lights,
+    objects,
+    screen_size,
+    max_depth,
+    output_dir: str,
+    render_model: RenderModel = RenderModel.default,
+    transforms: Optional[Dict[Object3D, Callable[[int], np.ndarray]]] = None,
+    workers: Optional[int] = None,
+    max_pending: Optional[int] = None,
+    file_pattern: str = "frame_{:04d}.npy",
+) -> List[str]:
+    transforms = transforms or {}
+    os.makedirs(output_dir, exist_ok=True)
+    copies = {}
+    objects = copy.deepcopy(list(objects), copies)
+    if any(id(obj) not in copies for obj in transforms):
+        raise ValueError("Only objects of the scene can be transformed")
+    scene = compile_scene(camera_path[0], ambient, lights, objects, in_place=True)
+    scene = scene._replace(objects=tuple(build_accelerator(scene.objects)))
+    state = _animation_state(scene, [copies[id(obj)] for obj in transforms])
+    paths = [os.path.join(output_dir, file_pattern.format(frame)) for frame in range(len(camera_path))]
+
+    def frame_args(frame):
+        offsets = [np.asarray(transform(frame), dtype=np.float64) for transform in transforms.values()]
+        return camera_path[frame], offsets, screen_size, max_depth, render_model, paths[frame]
+
+    if workers == 0:
+        for frame in range(len(paths)):
+            _render_frame(*frame_args(frame), state=state)
+        return paths
+
+    workers = workers or os.cpu_count() or 1
+    max_pending = max_pending or 2 * workers
+    payload = pickle.dumps(state, protocol=pickle.HIGHEST_PROTOCOL)
+    with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker, initargs=(payload,)) as executor:
+        pending = set()
+        for frame in range(len(paths)):
+            if len(pending) >= max_pending:
+                done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                for future in done:
+                    future.result()
+            pending.add(executor.submit(_render_frame, *frame_args(frame)))
+        for future in wait(pending).done:
+            future.result()
+    return paths
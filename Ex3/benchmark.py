@@ -0,0 +1,283 @@
+"""Benchmarks for the ray tracer, run with ``python benchmark.py <name>``"""
+
+import argparse
+import os
+import subprocess
+import sys
+import time
+import tracemalloc
+
+import numpy as np
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+
+
+def run_python(code):
+    """Runs code in a fresh interpreter from this directory and returns its stdout"""
+    result = subprocess.run([sys.executable, "-c", code], cwd=HERE, check=True, capture_output=True, text=True)
+    return result.stdout.strip()
+
+
+def bench_imports(args):
+    """Import time of hw3 in a fresh process, fails above the threshold"""
+    code = (
+        "import sys, time; start = time.perf_counter(); import hw3; "
+        "print(time.perf_counter() - start, 'matplotlib' in sys.modules)"
+    )
+    samples = [run_python(code).split() for _ in range(args.repeat)]
+    seconds = min(float(elapsed) for elapsed, _ in samples)
+    plotting_loaded = any(loaded == "True" for _, loaded in samples)
+    print(f"import hw3 {seconds:.3f}s (threshold {args.threshold:.3f}s), matplotlib loaded: {plotting_loaded}")
+    if seconds > args.threshold or plotting_loaded:
+        sys.exit("import time regression")
+
+
+def measure(func):
+    """Returns the seconds and the peak traced memory (bytes) of func()"""
+    tracemalloc.start()
+    start = time.perf_counter()
+    result = func()
+    elapsed = time.perf_counter() - start
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    del result
+    return elapsed, peak
+
+
+class DictRay:
+    """The previous Ray representation: instance __dict__, normalizing unless normalized=True"""
+
+    def __init__(self, origin, direction, refraction_index=1, normalized=False):
+        self.origin = origin
+        self.direction = direction if normalized else direction / np.linalg.norm(direction)
+        self.refraction_index = refraction_index
+
+
+def bench_rays(args):
+    """Memory and time to hold N rays: __dict__ vs __slots__ on the same work, and the skipped normalize"""
+    from helper_classes import Ray
+
+    origin = np.zeros(3)
+    directions = np.random.default_rng(0).normal(size=(args.count, 3))
+    directions /= np.linalg.norm(directions, axis=1)[:, None]
+    runs = {
+        "dict + normalize": measure(lambda: [DictRay(origin, d) for d in directions]),
+        "dict": measure(lambda: [DictRay(origin, d, normalized=True) for d in directions]),
+        "slots": measure(lambda: [Ray(origin, d, normalized=True) for d in directions]),
+    }
+    for name, (seconds, peak) in runs.items():
+        print(f"{name:>16}: {seconds:.3f}s peak={peak / args.count:.0f} B/ray")
+    (dict_seconds, dict_peak), (slots_seconds, slots_peak) = runs["dict"], runs["slots"]
+    print(f"__slots__ alone: {1 - slots_peak / dict_peak:.0%} less memory, {1 - slots_seconds / dict_seconds:.0%} less time")
+    (seconds, peak) = runs["dict + normalize"]
+    print(f"skipping normalize: {1 - dict_peak / peak:.0%} less memory, {1 - dict_seconds / seconds:.0%} less time")
+
+
+def bench_grid(args):
+    """Nearest hit of random rays among N random small spheres: linear scan vs uniform grid"""
+    from acceleration import UniformGrid
+    from helper_classes import Ray, Sphere
+
+    rng = np.random.default_rng(0)
+    origins = rng.uniform(-1, 1, size=(args.rays, 3)) * [1, 1, 0] + [0, 0, 2]
+    targets = rng.uniform(-1, 1, size=(args.rays, 3))
+    rays = [Ray(o, t - o) for o, t in zip(origins, targets)]
+    for count in args.counts:
+        radius = 0.5 / np.cbrt(count)  # keeps the fraction of the volume filled constant
+        spheres = [Sphere(center, radius) for center in rng.uniform(-1, 1, size=(count, 3))]
+        start = time.perf_counter()
+        grid = UniformGrid(spheres)
+        build = time.perf_counter() - start
+        start = time.perf_counter()
+        expected = [ray.nearest_intersected_object(spheres) for ray in rays]
+        linear = time.perf_counter() - start
+        start = time.perf_counter()
+        found = [grid.intersect(ray) for ray in rays]
+        traversal = time.perf_counter() - start
+        assert all(a[1] is b[1] for a, b in zip(expected, found)), "grid and linear scan disagree"
+        print(
+            f"{count:>7} spheres, grid {grid.resolution}: build {build:.2f}s, "
+            f"linear {linear / args.rays * 1e3:.2f}ms/ray, grid {traversal / args.rays * 1e3:.2f}ms/ray, "
+            f"speedup {linear / traversal:.0f}x"
+        )
+
+
+def bench_lights(args):
+    """Rendering a scene with N point and spot lights: every light vs LightSampler"""
+    from helper_classes import Plane, PointLight, Sphere, SpotLight
+    from hw3 import render_scene
+    from light_sampling import LightSampler
+
+    rng = np.random.default_rng(0)
+    lights = []
+    for position in rng.uniform([-3, 0.5, -4], [3, 2, 0], size=(args.count, 3)):
+        intensity = rng.uniform(0.5, 1, 3) * 4 / args.count
+        if rng.random() < 0.5:
+            lights.append(PointLight(intensity, position, 0.1, 0.5, 2))
+        else:
+            lights.append(SpotLight(intensity, position, [0, 1, 0], 0.1, 0.5, 2))  # direction points back to the light
+    floor = Plane([0, 1, 0], [0, -0.5, 0])
+    floor.set_material([0.2, 0.2, 0.2], [0.6, 0.6, 0.6], [0.3, 0.3, 0.3], 100, 0.2)
+    objects = [floor]
+    for center in rng.uniform([-1, -0.2, -2.5], [1, 0.4, -1], size=(4, 3)):
+        sphere = Sphere(center, 0.3)
+        sphere.set_material([0.1, 0, 0], [0.8, 0.3, 0.3], [0.5, 0.5, 0.5], 50, 0.3)
+        objects.append(sphere)
+    camera, ambient = np.array([0, 0, 1]), np.array([0.05, 0.05, 0.05])
+    screen_size = (args.width, args.height)
+    start = time.perf_counter()
+    exact = render_scene(camera, ambient, lights, objects, screen_size, args.depth)
+    exact_time = time.perf_counter() - start
+    for max_lights in args.max_lights:
+        sampler = LightSampler(lights, max_lights=max_lights, cutoff=args.cutoff)
+        start = time.perf_counter()
+        sampled = render_scene(camera, ambient, sampler, objects, screen_size, args.depth)
+        elapsed = time.perf_counter() - start
+        error = np.abs(sampled - exact).mean()
+        print(
+            f"{args.count} lights: all {exact_time:.2f}s, {max_lights} sampled {elapsed:.2f}s "
+            f"(speedup {exact_time / elapsed:.1f}x, mean abs error {error:.4f})"
+        )
+
+
+def bench_wavefront(args):
+    """your_own_scene (glass spheres) traced depth first by render_scene vs render_wavefront"""
+    from acceleration import build_accelerator
+    from hw3 import render_scene, your_own_scene
+    from wavefront import render_wavefront
+
+    camera, lights, objects, ambient = your_own_scene()
+    screen_size = (args.width, args.height)
+    start = time.perf_counter()
+    expected = render_scene(camera, ambient, lights, objects, screen_size, args.depth)
+    depth_first = time.perf_counter() - start
+    for name, scene_objects in (("objects", objects), ("bvh", build_accelerator(objects))):
+        start = time.perf_counter()
+        image = render_wavefront(camera, ambient, lights, scene_objects, screen_size, args.depth, batch_size=args.batch_size)
+        elapsed = time.perf_counter() - start
+        print(
+            f"{name:>7}: render_scene {depth_first:.2f}s, render_wavefront {elapsed:.2f}s "
+            f"(speedup {depth_first / elapsed:.1f}x, max difference {np.abs(image - expected).max():.1e})"
+        )
+
+
+def bench_precision(args):
+    """render_wavefront of your_own_scene in float64 vs float32: throughput and image difference"""
+    from acceleration import build_accelerator
+    from hw3 import your_own_scene
+    from wavefront import render_wavefront
+
+    camera, lights, objects, ambient = your_own_scene()
+    objects = build_accelerator(objects)
+    screen_size = (args.width, args.height)
+    pixels = args.width * args.height
+    images = {}
+    for dtype in (np.float64, np.float32):
+        start = time.perf_counter()
+        images[dtype] = render_wavefront(camera, ambient, lights, objects, screen_size, args.depth, dtype=dtype)
+        elapsed = time.perf_counter() - start
+        image_bytes = images[dtype].nbytes
+        print(f"{np.dtype(dtype).name}: {pixels / elapsed / 1e3:.1f} kpixel/s, image {image_bytes / 2**20:.2f} MiB")
+    difference = np.abs(images[np.float32] - images[np.float64])
+    psnr = 10 * np.log10(1 / np.mean(difference**2)) if difference.any() else np.inf
+    print(
+        f"float32 vs float64: max {difference.max():.2e}, mean {difference.mean():.2e}, "
+        f"pixels off by more than 1/255 {np.mean(difference.max(axis=2) > 1 / 255):.2%}, PSNR {psnr:.1f} dB"
+    )
+
+
+def sphere_mesh(center, radius, segments):
+    """A UV sphere Mesh with 2 * segments * (segments - 1) triangles"""
+    from helper_classes import Mesh
+
+    theta, phi = np.meshgrid(np.linspace(0, np.pi, segments + 1), np.linspace(0, 2 * np.pi, segments + 1), indexing="ij")
+    vertices = np.stack([np.sin(theta) * np.cos(phi), np.cos(theta), np.sin(theta) * np.sin(phi)], axis=-1)
+    vertices = (vertices * radius + center).reshape(-1, 3)
+    faces = []
+    for i in range(segments):
+        for j in range(segments):
+            a, c = i * (segments + 1) + j, (i + 1) * (segments + 1) + j
+            b, d = a + 1, c + 1
+            if i > 0:
+                faces.append([a, b, c])
+            if i < segments - 1:
+                faces.append([b, d, c])
+    mesh = Mesh(vertices, faces)
+    mesh.set_material([0.1, 0.1, 0.1], [0.5, 0.5, 0.5], [0.3, 0.3, 0.3], 10, 0)
+    mesh.apply_materials_to_triangles()
+    return mesh
+
+
+def bench_meshes(args):
+    """Nearest hit of random rays among meshes: every triangle vs bounding volume rejection vs entry ordering"""
+    from acceleration import EntryOrderedList
+    from helper_classes import Ray
+
+    rng = np.random.default_rng(0)
+    meshes = [sphere_mesh(center, 0.3, args.segments) for center in rng.uniform([-2, -1, -6], [2, 1, -2], size=(args.meshes, 3))]
+    for mesh in meshes:
+        mesh.compile()
+    ordered = EntryOrderedList(meshes)
+    targets = rng.uniform([-2, -1, -4], [2, 1, -4], size=(args.rays, 3))
+    rays = [Ray(np.array([0.0, 0.0, 1.0]), target - [0, 0, 1]) for target in targets]
+    triangles = [t for mesh in meshes for t in mesh.triangle_list]
+    runs = [
+        ("every triangle", lambda ray: ray.nearest_intersected_object(triangles)),
+        ("rejection", lambda ray: ray.nearest_intersected_object(meshes)),
+        ("entry ordered", ordered.intersect),
+    ]
+    results = {}
+    for name, trace in runs:
+        start = time.perf_counter()
+        results[name] = [trace(ray)[1] for ray in rays]
+        elapsed = time.perf_counter() - start
+        print(f"{name:>14}: {elapsed / args.rays * 1e3:.2f}ms/ray")
+    expected = results["every triangle"]
+    assert all(all(a is b for a, b in zip(expected, found)) for found in results.values()), "the hits differ"
+    print(f"{args.meshes} meshes of {len(meshes[0].triangle_list)} triangles, same hits")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__)
+    sub = parser.add_subparsers(dest="bench", required=True)
+    imports = sub.add_parser("imports", help=bench_imports.__doc__)
+    imports.add_argument("--repeat", type=int, default=5)
+    imports.add_argument("--threshold", type=float, default=0.5, help="maximum import time in seconds")
+    imports.set_defaults(func=bench_imports)
+    rays = sub.add_parser("rays", help=bench_rays.__doc__)
+    rays.add_argument("--count", type=int, default=100_000)
+    rays.set_defaults(func=bench_rays)
+    grid = sub.add_parser("grid", help=bench_grid.__doc__)
+    grid.add_argument("--counts", type=int, nargs="+", default=[1_000, 10_000, 100_000])
+    grid.add_argument("--rays", type=int, default=50)
+    grid.set_defaults(func=bench_grid)
+    lights = sub.add_parser("lights", help=bench_lights.__doc__)
+    lights.add_argument("--count", type=int, default=500)
+    lights.add_argument("--max-lights", type=int, nargs="+", default=[4, 16])
+    lights.add_argument("--cutoff", type=float, default=1e-4)
+    lights.add_argument("--width", type=int, default=32)
+    lights.add_argument("--height", type=int, default=24)
+    lights.add_argument("--depth", type=int, default=2)
+    lights.set_defaults(func=bench_lights)
+    wavefront = sub.add_parser("wavefront", help=bench_wavefront.__doc__)
+    wavefront.add_argument("--width", type=int, default=128)
+    wavefront.add_argument("--height", type=int, default=96)
+    wavefront.add_argument("--depth", type=int, default=4)
+    wavefront.add_argument("--batch-size", type=int, default=4096)
+    wavefront.set_defaults(func=bench_wavefront)
+    precision = sub.add_parser("precision", help=bench_precision.__doc__)
+    precision.add_argument("--width", type=int, default=256)
+    precision.add_argument("--height", type=int, default=192)
+    precision.add_argument("--depth", type=int, default=4)
+    precision.set_defaults(func=bench_precision)
+    meshes = sub.add_parser("meshes", help=bench_meshes.__doc__)
+    meshes.add_argument("--meshes", type=int, default=8)
+    meshes.add_argument("--segments", type=int, default=8)
+    meshes.add_argument("--rays", type=int, default=200)
+    meshes.set_defaults(func=bench_meshes)
+    args = parser.parse_args(argv)
+    args.func(args)
+
+
+if __name__ == "__main__":
+    main()
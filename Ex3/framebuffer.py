@@ -0,0 +1,78 @@
+import os
+import pickle
+from concurrent.futures import ProcessPoolExecutor
+from typing import Optional
+
+from hw3 import *
+
+FRAMEBUFFER_DTYPES = (np.float16, np.float32, np.float64)
+
+
+# Creates (mode "w+") or opens (mode "r+") a height x width x 3 image stored in a .npy file
+# and mapped in memory, pages are only loaded for the tiles being written.
+def open_framebuffer(path: str, screen_size=None, dtype=np.float32, mode: str = "r+") -> np.memmap:
+    if mode == "r+":
+        return np.lib.format.open_memmap(path, mode=mode)
+    if np.dtype(dtype) not in [np.dtype(d) for d in FRAMEBUFFER_DTYPES]:
+        raise ValueError(f"Unsupported framebuffer dtype {dtype}, use float16, float32 or float64")
+    width, height = screen_size
+    return np.lib.format.open_memmap(path, mode=mode, dtype=dtype, shape=(height, width, 3))
+
+
+_worker_state = {}
+
+
+def _tile_state(scene: Scene, path: str, screen_size, max_depth, render_model: RenderModel) -> dict:
+    return dict(
+        scene=scene,
+        framebuffer=open_framebuffer(path),
+        screen_size=screen_size,
+        max_depth=max_depth,
+        model_func=get_model_func(render_model),
+    )
+
+
+def _init_worker(payload: bytes, path: str, screen_size, max_depth, render_model: RenderModel):
+    _worker_state.update(_tile_state(pickle.loads(payload), path, screen_size, max_depth, render_model))
+
+
+def _render_tile_to_framebuffer(rows: slice, cols: slice, state: Optional[dict] = None):
+    state = _worker_state if state is None else state
+    tile = render_tile(state["scene"], state["screen_size"], state["max_depth"], state["model_func"], rows, cols)
+    framebuffer = state["framebuffer"]
+    framebuffer[rows, cols] = tile
+    framebuffer.flush()
+
+
+# Renders the scene into a memory mapped .npy file at path, tile by tile, and returns the path.
+# Only one tile per worker is held in memory whatever the resolution; workers=0 renders in this
+# process, otherwise each worker process maps the same file and writes the tiles it renders.
+# objects can be the output of acceleration.build_accelerator.
+def render_to_framebuffer(
+    camera,
+    ambient,
+    lights,
+    objects,
+    screen_size,
+    max_depth,
+    path: str,
+    render_model: RenderModel = RenderModel.default,
+    dtype=np.float32,
+    tile_size: int = 64,
+    workers: Optional[int] = 0,
+) -> str:
+    scene = compile_scene(camera, ambient, lights, objects)
+    open_framebuffer(path, screen_size, dtype, mode="w+").flush()  # creates the file the tiles are written to
+    tiles = list(iter_tiles(screen_size, tile_size))
+    if workers == 0:
+        state = _tile_state(scene, path, screen_size, max_depth, render_model)
+        for rows, cols in tiles:
+            _render_tile_to_framebuffer(rows, cols, state)
+        return path
+
+    payload = pickle.dumps(scene, protocol=pickle.HIGHEST_PROTOCOL)
+    initargs = (payload, os.path.abspath(path), screen_size, max_depth, render_model)
+    with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker, initargs=initargs) as executor:
+        for future in [executor.submit(_render_tile_to_framebuffer, rows, cols) for rows, cols in tiles]:
+            future.result()
+    return path
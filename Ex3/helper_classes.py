@@ -1,11 +1,11 @@
 from typing import List, Tuple
 
 import numpy as np
-from numpy import linalg as LA
 import re
 
 EPSILON = 1e-5
 AIR_REFRACTION = 1
+OFFSET_ULPS = 1024  # spacings of floats at a hit point that the rays spawned there are moved by
 
 # This function gets a vector and returns its normalized form.
 def normalize(vector):
@@ -20,8 +20,90 @@ def reflected(vector, normal):
     return vector - 2 * vector.dot(n) * n
 
 
+# Same as reflected, for normals that are already unit length (the normals of compiled objects)
+def reflected_unit(vector, unit_normal):
+    return vector - 2 * vector.dot(unit_normal) * unit_normal
+
+
+# Returns a read-only copy of a vector, used for the invariants of compiled objects.
+# dtype is float64, or float32 for scenes rendered in single precision.
+def frozen_vector(vector, dtype=np.float64):
+    v = np.array(vector, dtype=dtype)
+    v.setflags(write=False)
+    return v
+
+
+# Returns a copy of a vector in dtype, what precompute stores; compile makes it read-only
+def stored_vector(vector, dtype=np.float64):
+    return np.array(vector, dtype=dtype)
+
+
+# How far along the normal the rays spawned at the (N, 3) points start so that they do not hit
+# the surface again: EPSILON, or OFFSET_ULPS float spacings of the point coordinates when that is
+# more, which is the case for float32 points or far from the origin
+def ray_offsets(points):
+    scale = np.abs(points).max(axis=1)
+    return np.maximum(EPSILON, OFFSET_ULPS * np.finfo(points.dtype).eps * scale)
+
+
+# Slab test: returns the distance at which the ray enters the box (lo, hi), None if it misses it
+# or enters it further than t_max. inv_direction is 1 / ray.direction.
+def ray_box_entry(origin, inv_direction, lo, hi, t_max=np.inf):
+    t1 = (lo - origin) * inv_direction
+    t2 = (hi - origin) * inv_direction
+    t_enter = np.nanmax(np.minimum(t1, t2))
+    t_exit = np.nanmin(np.maximum(t1, t2))
+    if t_exit < max(t_enter, 0) or t_enter > t_max:
+        return None
+    return t_enter
+
+
+# ray_box_entry row by row: origins and inv_directions, lo and hi are (N, 3) arrays or single
+# vectors (many rays and one box, or one ray and many boxes). Returns inf where the box is missed.
+def box_entries(origins, inv_directions, lo, hi, t_max=np.inf):
+    with np.errstate(invalid="ignore"):
+        t1 = (lo - origins) * inv_directions
+        t2 = (hi - origins) * inv_directions
+    t_enter = np.fmax.reduce(np.minimum(t1, t2), axis=-1)
+    t_exit = np.fmin.reduce(np.maximum(t1, t2), axis=-1)
+    return np.where((t_exit < np.maximum(t_enter, 0)) | (t_enter > t_max), np.inf, t_enter)
+
+
+def inverse_direction(direction):
+    with np.errstate(divide="ignore"):
+        return 1.0 / direction
+
+
+# Row by row dot product of two (N, 3) arrays
+def row_dot(a, b):
+    return np.einsum("ij,ij->i", a, b)
+
+
+# What the intersect_batch of a primitive returns: the distances, inf where the ray missed, and
+# an object array of the hit component, None where the ray missed
+def batch_hits(t, hit, component):
+    components = np.full(len(t), None, dtype=object)
+    components[hit] = component
+    return np.where(hit, t, np.inf), components
+
+
+# Ray.nearest_intersected_object for N rays at once, the origins and unit directions are (N, 3)
+# arrays. Returns the distances (inf where nothing is hit) and an object array of the components.
+def nearest_intersected_batch(objects, origins, directions):
+    min_distance = np.full(len(origins), np.inf, dtype=origins.dtype)
+    nearest_object = np.full(len(origins), None, dtype=object)
+    for obj in objects:
+        dist_obj, components = obj.intersect_batch(origins, directions)
+        closer = dist_obj < min_distance
+        min_distance[closer] = dist_obj[closer]
+        nearest_object[closer] = components[closer]
+    return min_distance, nearest_object
+
+
 ## Lights
 class Object3D:
+    __slots__ = ("ambient", "diffuse", "specular", "shininess", "reflection", "refraction", "refraction_index")
+
     def set_material(self, ambient, diffuse, specular, shininess, reflection, refraction=None, refraction_index=1):
         self.ambient = np.float64(ambient)
         self.diffuse = np.float64(diffuse)
@@ -34,11 +116,56 @@ class Object3D:
     def normal(self, point):
         raise NotImplementedError
 
+    # Vectorized intersect over the rays (origins[i], directions[i]), see nearest_intersected_batch.
+    # This default intersects the rays one by one, primitives override it.
+    def intersect_batch(self, origins, directions):
+        t = np.full(len(origins), np.inf, dtype=origins.dtype)
+        components = np.full(len(origins), None, dtype=object)
+        for i, (origin, direction) in enumerate(zip(origins, directions)):
+            dist, component = self.intersect(Ray(origin, direction, normalized=True))
+            if component is not None:
+                t[i], components[i] = dist, component
+        return t, components
+
+    # Returns the (min corner, max corner) of the axis aligned bounding box, None if unbounded
+    def bounds(self):
+        return None
+
+    # Moves the object by offset
+    def translate(self, offset):
+        raise NotImplementedError
+
+    # Precomputes the per-object invariants used by intersect and normal, stored as dtype
+    def precompute(self, dtype=np.float64):
+        pass
+
+    # Validates the object and precomputes its invariants, done once before rendering.
+    # The values are converted in place and the arrays made read-only (see freeze), which is why
+    # compile_scene compiles copies of the caller's objects.
+    def compile(self, dtype=np.float64):
+        if not hasattr(self, "ambient"):
+            raise ValueError(f"{type(self).__name__} has no material, call set_material before rendering")
+        self.ambient = frozen_vector(self.ambient, dtype)
+        self.diffuse = frozen_vector(self.diffuse, dtype)
+        self.specular = frozen_vector(self.specular, dtype)
+        self.precompute(dtype)
+        self.freeze()
+
+    # Makes the arrays of the object read-only, the invariants precompute derived from them
+    # would go stale if they were edited in place
+    def freeze(self):
+        for name in (name for cls in type(self).__mro__ for name in getattr(cls, "__slots__", ())):
+            if isinstance(value := getattr(self, name, None), np.ndarray):
+                value.setflags(write=False)
+
 
 class Ray:
-    def __init__(self, origin, direction, refraction_index=AIR_REFRACTION):
+    __slots__ = ("origin", "direction", "refraction_index")
+
+    # normalized=True skips the normalization of directions that are already unit length
+    def __init__(self, origin, direction, refraction_index=AIR_REFRACTION, normalized=False):
         self.origin = origin
-        self.direction = normalize(direction)
+        self.direction = direction if normalized else normalize(direction)
         self.refraction_index = refraction_index
 
     # The function is getting the collection of objects in the scene and looks for the one with minimum distance.
@@ -64,10 +191,12 @@ class Ray:
             new_index = obj.refraction_index  # enters new medium
         else:
             new_index = AIR_REFRACTION
-        return Ray(P - EPSILON * N, L, new_index)
+        return Ray(P - EPSILON * N, L, new_index, normalized=True)
 
 
 class LightSource:
+    __slots__ = ("intensity",)
+
     def __init__(self, intensity):
         self.intensity = intensity
 
@@ -77,29 +206,58 @@ class LightSource:
     def get_distance_from_light(self, intersection) -> float:
         raise NotImplementedError
 
-    def get_intensity(self, intersection) -> float:
+    def get_intensity(self, intersection, distance=None) -> float:
+        raise NotImplementedError
+
+    # Vectorized get_light_ray, get_distance_from_light and get_intensity for (N, 3) points:
+    # returns the unit directions to the light, the distances and the intensities
+    def illuminate_batch(self, points):
         raise NotImplementedError
 
+    # Validates the light and precomputes its invariants, done once before rendering
+    def compile(self, dtype=np.float64):
+        self.intensity = frozen_vector(self.intensity, dtype)
+        if self.intensity.shape != (3,):
+            raise ValueError(f"{type(self).__name__} intensity must be an RGB triplet")
+
 
 class DirectionalLight(LightSource):
+    __slots__ = ("direction", "_to_light")
+
     def __init__(self, intensity, direction):
         super().__init__(intensity)
         self.direction = normalize(direction)
+        self._to_light = -self.direction
+
+    def compile(self, dtype=np.float64):
+        super().compile(dtype)
+        self.direction = frozen_vector(self.direction, dtype)
+        self._to_light = frozen_vector(-self.direction, dtype)
 
     # This function returns the ray that goes from the light source to a point
     def get_light_ray(self, intersection_point) -> Ray:
-        return Ray(intersection_point, - self.direction)
+        return Ray(intersection_point, self._to_light, normalized=True)
 
     # This function returns the distance from a point to the light source
     def get_distance_from_light(self, intersection):
         return np.inf
 
     # This function returns the light intensity at a point
-    def get_intensity(self, intersection):
+    def get_intensity(self, intersection, distance=None):
         return self.intensity
 
+    def illuminate_batch(self, points):
+        count = len(points)
+        return (
+            np.broadcast_to(self._to_light, (count, 3)),
+            np.full(count, np.inf, dtype=points.dtype),
+            np.broadcast_to(self.intensity, (count, 3)),
+        )
+
 
 class PointLight(LightSource):
+    __slots__ = ("position", "kc", "kl", "kq")
+
     def __init__(self, intensity, position, kc, kl, kq):
         super().__init__(intensity)
         self.position = np.array(position)
@@ -107,57 +265,104 @@ class PointLight(LightSource):
         self.kl = kl
         self.kq = kq
 
+    def compile(self, dtype=np.float64):
+        super().compile(dtype)
+        self.position = frozen_vector(self.position, dtype)
+        if self.kc < 0 or self.kl < 0 or self.kq < 0 or self.kc + self.kl + self.kq <= 0:
+            raise ValueError(f"{type(self).__name__} attenuation factors must be non-negative and not all zero")
+
     # This function returns the ray that goes from the light source to a point
     def get_light_ray(self, intersection) -> Ray:
-        return Ray(intersection, normalize(self.position - intersection))
+        return Ray(intersection, self.position - intersection)
 
     # This function returns the distance from a point to the light source
     def get_distance_from_light(self, intersection):
         return np.linalg.norm(intersection - self.position)
 
     # This function returns the light intensity at a point
-    def get_intensity(self, intersection):
-        d = self.get_distance_from_light(intersection)
+    # The distance can be passed when the caller already computed it
+    def get_intensity(self, intersection, distance=None):
+        d = self.get_distance_from_light(intersection) if distance is None else distance
         return self.intensity / (self.kc + self.kl * d + self.kq * d * d)
 
+    def illuminate_batch(self, points):
+        to_light = self.position - points
+        d = np.linalg.norm(to_light, axis=1)
+        intensity = self.intensity / (self.kc + self.kl * d + self.kq * d * d)[:, None]
+        return to_light / d[:, None], d, intensity
+
 
 class SpotLight(PointLight):
+    __slots__ = ("direction",)
+
     def __init__(self, intensity, position, direction, kc, kl, kq):
         super().__init__(intensity, position, kc, kl, kq)
         self.direction = normalize(direction)
 
-    def get_intensity(self, intersection):
-        v = normalize(self.position - intersection)
-        return super().get_intensity(intersection) * np.dot(v, self.direction)
+    def compile(self, dtype=np.float64):
+        super().compile(dtype)
+        self.direction = frozen_vector(self.direction, dtype)
+
+    def get_intensity(self, intersection, distance=None):
+        d = self.get_distance_from_light(intersection) if distance is None else distance
+        v = (self.position - intersection) / d
+        return super().get_intensity(intersection, d) * np.dot(v, self.direction)
+
+    def illuminate_batch(self, points):
+        directions, d, intensity = super().illuminate_batch(points)
+        return directions, d, intensity * (directions @ self.direction)[:, None]
 
 
 class Plane(Object3D):
+    __slots__ = ("_normal", "point", "offset")
+
     def __init__(self, normal, point):
         self._normal = normalize(np.array(normal, dtype=np.float64))
         self.point = np.array(point, dtype=np.float64)
+        self.precompute()
+
+    def precompute(self, dtype=np.float64):
+        self._normal = stored_vector(self._normal, dtype)
+        self.point = stored_vector(self.point, dtype)
+        self.offset = self._normal @ self.point  # n.x = offset for every point x of the plane
 
     def intersect(self, ray: Ray):
-        v = self.point - ray.origin
-        denom = np.dot(self._normal, ray.direction)
+        denom = self._normal @ ray.direction
         if abs(denom) < EPSILON:
             return None, None
-        t = np.dot(v, self._normal) / denom
+        t = (self.offset - self._normal @ ray.origin) / denom
         if t > 0:
             return t, self
         else:
             return None, None
 
+    def intersect_batch(self, origins, directions):
+        denom = directions @ self._normal
+        with np.errstate(divide="ignore", invalid="ignore"):
+            t = (self.offset - origins @ self._normal) / denom
+        return batch_hits(t, ~(np.abs(denom) < EPSILON) & (t > 0), self)
+
     def normal(self, point):
         return self._normal
 
+    def translate(self, offset):
+        self.point = self.point + offset
+        self.precompute()
+
 
 class Triangle(Object3D):
+    __slots__ = ("a", "b", "c", "v_ab", "v_ac", "_normal")
+
     # Triangle gets 3 points as arguments
     def __init__(self, a, b, c):
         self.a = np.array(a, dtype=np.float64)
         self.b = np.array(b, dtype=np.float64)
         self.c = np.array(c, dtype=np.float64)
-        self._normal = self.compute_normal()
+        self.precompute()
+
+    def precompute(self, dtype=np.float64):
+        self.a, self.b, self.c = stored_vector(self.a, dtype), stored_vector(self.b, dtype), stored_vector(self.c, dtype)
+        self._normal = stored_vector(self.compute_normal(), dtype)
 
     def compute_normal(self):
         self.v_ab = self.b - self.a
@@ -191,37 +396,170 @@ class Triangle(Object3D):
         else:
             return None, None
 
+    # The same tests as intersect, a NaN passes the tests it passes there
+    def intersect_batch(self, origins, directions):
+        p = np.cross(directions, self.v_ac)
+        det = p @ self.v_ab
+        with np.errstate(divide="ignore", invalid="ignore"):
+            inv_det = 1.0 / det
+            r = origins - self.a
+            u = row_dot(r, p) * inv_det
+            q = np.cross(r, self.v_ab)
+            v = row_dot(directions, q) * inv_det
+            t = q @ self.v_ac * inv_det
+        hit = ~(np.abs(det) < EPSILON) & ~((u < 0) | (u > 1)) & ~((v < 0) | (u + v > 1)) & (t > EPSILON)
+        return batch_hits(t, hit, self)
+
     def normal(self, point):
         return self._normal
 
+    def bounds(self):
+        vertices = np.array([self.a, self.b, self.c])
+        return vertices.min(axis=0), vertices.max(axis=0)
+
+    def translate(self, offset):
+        self.a, self.b, self.c = self.a + offset, self.b + offset, self.c + offset
+        self.precompute()
+
 
 class Sphere(Object3D):
+    __slots__ = ("center", "radius", "radius_sq", "inv_radius")
+
     def __init__(self, center, radius: float):
         self.center = center
         self.radius = radius
+        self.precompute()
+
+    def precompute(self, dtype=np.float64):
+        if self.radius <= 0:
+            raise ValueError("Sphere radius must be positive")
+        self.center = stored_vector(self.center, dtype)
+        self.radius_sq = np.dtype(dtype).type(self.radius * self.radius)
+        self.inv_radius = np.dtype(dtype).type(1.0 / self.radius)
 
     def intersect(self, ray: Ray):
         _r = self.center - ray.origin
         if (v := _r.dot(ray.direction)) >= 0:
             if (d_2 := _r @ _r - v * v) >= 0:
-                if (diff := self.radius * self.radius - d_2) >= 0:
+                if (diff := self.radius_sq - d_2) >= 0:
                     return v - np.sqrt(diff), self
         return None, None
 
+    def intersect_batch(self, origins, directions):
+        _r = self.center - origins
+        v = row_dot(_r, directions)
+        d_2 = row_dot(_r, _r) - v * v
+        diff = self.radius_sq - d_2
+        hit = (v >= 0) & (d_2 >= 0) & (diff >= 0)
+        with np.errstate(invalid="ignore"):
+            return batch_hits(v - np.sqrt(diff), hit, self)
+
     def normal(self, point):
-        return normalize(point - self.center)
+        return (point - self.center) * self.inv_radius
 
+    def bounds(self):
+        return self.center - self.radius, self.center + self.radius
+
+    def translate(self, offset):
+        self.center = self.center + offset
+        self.precompute()
+
+
+# Base of the objects made of other objects (meshes, instances). Their bounding box and bounding
+# sphere are computed on first use and cached until invalidate_bounds, which the objects call
+# when they change. intersect rejects the rays that miss the whole object with misses.
+class CompositeObject(Object3D):
+    __slots__ = ("_bounds", "_rejection")
+
+    # Returns the (min corner, max corner) of the object, None if unbounded
+    def compute_bounds(self):
+        raise NotImplementedError
+
+    # Returns the (center, radius) of a sphere around the object, the one around its box by default
+    def compute_bounding_sphere(self):
+        lo, hi = self.bounds()
+        return (lo + hi) / 2, np.linalg.norm(hi - lo) / 2
+
+    def invalidate_bounds(self):
+        self._bounds = None
+        self._rejection = None
+
+    def bounds(self):
+        if self._bounds is None:
+            self._bounds = self.compute_bounds()
+        return self._bounds
+
+    # The box and the sphere (center, squared radius) the rays are tested against, padded by
+    # EPSILON so that grazing hits are not rejected by rounding
+    def rejection_volumes(self):
+        if self._rejection is None:
+            lo, hi = self.bounds()
+            center, radius = self.compute_bounding_sphere()
+            self._rejection = (lo - EPSILON, hi + EPSILON, center, (radius + EPSILON) ** 2)
+        return self._rejection
+
+    # True when the ray cannot hit the object: it misses the bounding sphere (cheap), or the box
+    def misses(self, ray: Ray):
+        if self.bounds() is None:
+            return False
+        lo, hi, center, radius_sq = self.rejection_volumes()
+        _r = center - ray.origin
+        v = _r @ ray.direction
+        dist_sq = _r @ _r
+        if dist_sq > radius_sq and (v < 0 or dist_sq - v * v > radius_sq):
+            return True
+        return ray_box_entry(ray.origin, inverse_direction(ray.direction), lo, hi) is None
+
+    # misses for (N, 3) arrays of rays, with the box only
+    def misses_batch(self, origins, directions):
+        if self.bounds() is None:
+            return np.zeros(len(origins), dtype=bool)
+        lo, hi, _, _ = self.rejection_volumes()
+        return box_entries(origins, inverse_direction(directions), lo, hi) == np.inf
+
+
+class Mesh(CompositeObject):
+    __slots__ = ("_v_list", "f_list", "triangle_list")
 
-class Mesh(Object3D):
     # Mesh are defined by a list of vertices, and a list of faces.
     # The faces are triplets of vertices by their index number.
     def __init__(self, v_list, f_list):
-        self.v_list = v_list
         self.f_list = f_list
         self.triangle_list: List[Triangle] = []
+        self.v_list = v_list
         for p1, p2, p3 in self.f_list:
             self.triangle_list.append(Triangle(self.v_list[p1], self.v_list[p2], self.v_list[p3]))
 
+    # Assigning the vertices moves the triangles onto them (keeping their materials and dtype) and
+    # invalidates the cached bounds. Vertices edited in place need an explicit invalidate_bounds
+    # and do not move the triangles.
+    @property
+    def v_list(self):
+        return self._v_list
+
+    @v_list.setter
+    def v_list(self, v_list):
+        self._v_list = v_list
+        self.invalidate_bounds()
+        for t, (p1, p2, p3) in zip(self.triangle_list, self.f_list):
+            dtype = t.a.dtype
+            t.a, t.b, t.c = v_list[p1], v_list[p2], v_list[p3]
+            t.precompute(dtype)
+
+    # Precomputes the triangles, which may have no material (the geometry of an instance)
+    def precompute(self, dtype=np.float64):
+        self.invalidate_bounds()
+        for t in self.triangle_list:
+            t.precompute(dtype)
+
+    # The mesh itself is never returned by intersect, its triangles carry the material
+    def compile(self, dtype=np.float64):
+        self.invalidate_bounds()
+        if any(not hasattr(t, "ambient") for t in self.triangle_list):
+            raise ValueError("Mesh triangles have no material, call apply_materials_to_triangles before rendering")
+        for t in self.triangle_list:
+            t.compile(dtype)
+
     def apply_materials_to_triangles(self):
         for t in self.triangle_list:
             t.set_material(
@@ -237,8 +575,109 @@ class Mesh(Object3D):
     # Hint: Intersect returns both distance and nearest object.
     # Keep track of both.
     def intersect(self, ray: Ray):
+        if self.misses(ray):
+            return None, None
         return ray.nearest_intersected_object(self.triangle_list)
 
+    def intersect_batch(self, origins, directions):
+        t = np.full(len(origins), np.inf, dtype=origins.dtype)
+        components = np.full(len(origins), None, dtype=object)
+        rays = np.flatnonzero(~self.misses_batch(origins, directions))
+        t[rays], components[rays] = nearest_intersected_batch(self.triangle_list, origins[rays], directions[rays])
+        return t, components
+
+    def compute_bounds(self):
+        vertices = np.asarray(self.v_list, dtype=np.float64)
+        return vertices.min(axis=0), vertices.max(axis=0)
+
+    # The sphere around the center of the box through the farthest vertex
+    def compute_bounding_sphere(self):
+        lo, hi = self.bounds()
+        center = (lo + hi) / 2
+        return center, np.linalg.norm(np.asarray(self.v_list, dtype=np.float64) - center, axis=1).max()
+
+    def translate(self, offset):
+        self.v_list = np.asarray(self.v_list, dtype=np.float64) + offset
+
+
+# An instance places a shared geometry (e.g. a Mesh) in the scene with its own transform and material.
+# The geometry stays in object space: rays are transformed into it, so repeating a mesh does
+# not copy its triangles. The geometry does not need a material, the instance's is used.
+class Instance(CompositeObject):
+    __slots__ = ("geometry", "transform", "_inverse", "_normal_matrix")
+
+    # transform is a 4x4 object to world matrix, see transform_matrix
+    def __init__(self, geometry: Object3D, transform):
+        self.geometry = geometry
+        self.transform = np.array(transform, dtype=np.float64)
+        self.precompute()
+
+    # The transform stays in float64 and is inverted in float64, inverting it in float32 would
+    # lose precision; the inverse and the normal matrix the rays go through are stored as dtype
+    def precompute(self, dtype=np.float64):
+        if self.transform.shape != (4, 4):
+            raise ValueError("Instance transform must be a 4x4 matrix")
+        inverse = np.linalg.inv(self.transform)
+        self._inverse = inverse.astype(dtype)
+        self._normal_matrix = inverse[:3, :3].T.astype(dtype)
+        self.invalidate_bounds()
+
+    # The geometry was precomputed in float64 when it was built, it may have no material so it
+    # is only precomputed again for the other dtypes
+    def compile(self, dtype=np.float64):
+        super().compile(dtype)
+        if np.dtype(dtype) != np.float64:
+            self.geometry.precompute(dtype)
+
+    def intersect(self, ray: Ray):
+        if self.misses(ray):
+            return None, None
+        direction = self._inverse[:3, :3] @ ray.direction
+        scale = np.linalg.norm(direction)  # world distance t is object distance / scale
+        origin = self._inverse[:3, :3] @ ray.origin + self._inverse[:3, 3]
+        t, component = self.geometry.intersect(Ray(origin, direction / scale, normalized=True))
+        if component is None:
+            return None, None
+        return t / scale, InstanceHit(self, component)
+
+    # Normal of the geometry at point (in world space)
+    def normal(self, point):
+        return InstanceHit(self, self.geometry).normal(point)
+
+    def compute_bounds(self):
+        if (geometry_bounds := self.geometry.bounds()) is None:
+            return None
+        lo, hi = geometry_bounds
+        corners = np.array([[x, y, z, 1] for x in (lo[0], hi[0]) for y in (lo[1], hi[1]) for z in (lo[2], hi[2])])
+        world = (corners @ self.transform.T)[:, :3]
+        return world.min(axis=0), world.max(axis=0)
+
+    def translate(self, offset):
+        transform = self.transform.copy()
+        transform[:3, 3] += offset
+        self.transform = transform
+        self.precompute()
+
+
+# What Instance.intersect returns: the primitive hit in object space, seen through the instance.
+# The material is the instance's and the normal is transformed to world space.
+class InstanceHit:
+    __slots__ = ("instance", "component")
+
+    def __init__(self, instance: Instance, component: Object3D):
+        self.instance = instance
+        self.component = component
+
+    def __getattr__(self, name):
+        if name in Object3D.__slots__:
+            return getattr(self.instance, name)
+        raise AttributeError(name)
+
+    def normal(self, point):
+        inverse = self.instance._inverse
+        n = self.component.normal(inverse[:3, :3] @ point + inverse[:3, 3])
+        return normalize(self.instance._normal_matrix @ n)
+
 
 def rotation_z(point: Tuple[float, float, float], degrees: float):
     deg = np.deg2rad(degrees)
@@ -246,6 +685,16 @@ def rotation_z(point: Tuple[float, float, float], degrees: float):
     return matrix @ np.array(point)
 
 
+# Returns the 4x4 matrix that scales, then rotates around z (like rotation_z) and then translates
+def transform_matrix(translation=(0, 0, 0), rotation_z_degrees: float = 0, scale=1):
+    deg = np.deg2rad(rotation_z_degrees)
+    rotation = np.array([[np.cos(deg), np.sin(deg), 0], [-np.sin(deg), np.cos(deg), 0], [0, 0, 1]])
+    matrix = np.eye(4)
+    matrix[:3, :3] = rotation * np.broadcast_to(np.asarray(scale, dtype=np.float64), 3)
+    matrix[:3, 3] = translation
+    return matrix
+
+
 def read_obj(filename: str) -> Mesh:
     vectors = []
     faces = []
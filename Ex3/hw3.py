@@ -1,10 +1,21 @@
-from ast import Raise
-from typing import List, Callable
+from typing import List, Callable, Iterator, Optional, Union
 from enum import Enum
 
-import matplotlib.pyplot as plt
-
 from helper_classes import *
+from light_sampling import LightSampler
+from scene import Scene, compile_scene
+
+
+# matplotlib is only needed to display the renders, pyplot is imported on the first use of plt.
+# plt is a module level name so that "from hw3 import *" still provides it.
+class _LazyPyplot:
+    def __getattr__(self, name):
+        import matplotlib.pyplot
+
+        return getattr(matplotlib.pyplot, name)
+
+
+plt = _LazyPyplot()
 
 
 class RenderModel(Enum):
@@ -13,25 +24,57 @@ class RenderModel(Enum):
     default = phong
 
 
+def get_model_func(render_model: RenderModel) -> Callable:
+    match render_model:
+        case RenderModel.blinn_phong:
+            return lambda n, D, L, V, a: normalize(L - D).dot(n) ** (a / 4)
+        case RenderModel.phong:
+            return lambda n, D, L, V, a: (L @ V) ** a
+
+
 def render_scene(camera, ambient, lights, objects, screen_size, max_depth, render_model: RenderModel = RenderModel.default):
+    scene = compile_scene(camera, ambient, lights, objects)
+    return render_compiled_scene(scene, screen_size, max_depth, render_model)
+
+
+# Renders a scene that was already compiled by compile_scene
+def render_compiled_scene(scene: Scene, screen_size, max_depth, render_model: RenderModel = RenderModel.default):
+    model_func = get_model_func(render_model)
+    return render_tile(scene, screen_size, max_depth, model_func, slice(None), slice(None))
+
+
+# Returns the y coordinates of the pixel rows and the x coordinates of the pixel columns on the screen
+def screen_coordinates(screen_size):
     width, height = screen_size
     ratio = float(width) / height
     screen = (-1, 1 / ratio, 1, -1 / ratio)  # left, top, right, bottom
+    return np.linspace(screen[1], screen[3], height), np.linspace(screen[0], screen[2], width)
 
-    image = np.zeros((height, width, 3))
 
-    match render_model:
-        case RenderModel.blinn_phong:
-            model_func = lambda n, D, L, V, a: normalize(L - D).dot(n) ** (a / 4)
-        case RenderModel.phong:
-            model_func = lambda n, D, L, V, a: (L @ V) ** a
-    for i, y in enumerate(np.linspace(screen[1], screen[3], height)):
-        for j, x in enumerate(np.linspace(screen[0], screen[2], width)):
-            pixel = np.array([x, y, 0])
-            ray = Ray(camera, normalize(pixel - camera))
-            color = ray_trace(ray, ambient, lights, objects, max_depth, model_func)
-            image[i, j] = np.clip(color, 0, 1)
-    return image
+# Splits the image into tile_size x tile_size tiles, yields the (rows, cols) slices of each tile
+def iter_tiles(screen_size, tile_size: int) -> Iterator[Tuple[slice, slice]]:
+    width, height = screen_size
+    for top in range(0, height, tile_size):
+        for left in range(0, width, tile_size):
+            yield slice(top, min(top + tile_size, height)), slice(left, min(left + tile_size, width))
+
+
+# Renders the pixels rows x cols (two slices) of the image.
+# touched, when given, collects the objects and lights the rays of the tile used.
+def render_tile(scene: Scene, screen_size, max_depth, model_func: Callable, rows: slice, cols: slice, touched=None):
+    ys, xs = screen_coordinates(screen_size)
+    ys, xs = ys[rows], xs[cols]
+    tile = np.zeros((len(ys), len(xs), 3))
+    camera, ambient, lights, objects = scene
+    for i, y in enumerate(ys):
+        # the primary directions of a row are normalized together, rays only hold views of them
+        directions = np.column_stack((xs, np.full(len(xs), y), np.zeros(len(xs)))) - camera
+        directions /= np.linalg.norm(directions, axis=1)[:, None]
+        for j in range(len(xs)):
+            ray = Ray(camera, directions[j], normalized=True)
+            color = ray_trace(ray, ambient, lights, objects, max_depth, model_func, touched)
+            tile[i, j] = np.clip(color, 0, 1)
+    return tile
 
 
 def render_scene_blinn(*args, **kwargs):
@@ -41,10 +84,11 @@ def render_scene_blinn(*args, **kwargs):
 def ray_trace(
     ray: Ray,
     ambient: Tuple[float, float, float],
-    lights: List[LightSource],
+    lights: Union[List[LightSource], LightSampler],
     objects: List[Object3D],
     max_depth: int,
     model_func: Callable,
+    touched: Optional[set] = None,
 ):
     color = np.zeros(3)
     if max_depth <= 0:
@@ -52,28 +96,33 @@ def ray_trace(
     t, obj = ray.nearest_intersected_object(objects)
     if obj is None and t > 0:
         return color
+    if touched is not None:
+        touched.add(obj)
+        touched.update(lights)
     color += ambient * obj.ambient
     P = ray.origin + t * ray.direction  # intersection
-    n = obj.normal(P)
+    n = obj.normal(P)  # unit normal of a compiled object
     if n @ ray.direction > 0:  # ray must be in the opposite direction from the normal
-        n *= -1
-    V = reflected(ray.direction, n)
+        n = -n  # not in place, n can be the object's stored normal
+    V = reflected_unit(ray.direction, n)
     _P = P + EPSILON * n
-    for light in lights:
+    shading_lights = lights.sample(_P) if isinstance(lights, LightSampler) else ((light, 1) for light in lights)
+    for light, weight in shading_lights:
         ray_to_light = light.get_light_ray(_P)
         d, _ = ray_to_light.nearest_intersected_object(objects)
-        if d and d < light.get_distance_from_light(_P):
+        distance = light.get_distance_from_light(_P)
+        if d and d < distance:
             continue
         L = ray_to_light.direction  # Reflection of the vector from intersection to light
-        color += light.get_intensity(_P) * (
+        color += weight * light.get_intensity(_P, distance) * (
             L @ n * obj.diffuse + model_func(n, ray.direction, L, V, obj.shininess) * obj.specular
         )
     if obj.reflection:
-        refractive_ray = Ray(_P, V, ray.refraction_index)
-        color += obj.reflection * ray_trace(refractive_ray, ambient, lights, objects, max_depth - 1, model_func)
+        refractive_ray = Ray(_P, V, ray.refraction_index, normalized=True)
+        color += obj.reflection * ray_trace(refractive_ray, ambient, lights, objects, max_depth - 1, model_func, touched)
     if obj.refraction:
         reflective_ray = ray.calc_refraction(obj, P, n)
-        color += obj.refraction * ray_trace(reflective_ray, ambient, lights, objects, max_depth - 1, model_func)
+        color += obj.refraction * ray_trace(reflective_ray, ambient, lights, objects, max_depth - 1, model_func, touched)
     return color
 
 
@@ -0,0 +1,78 @@
+import os
+import struct
+import zlib
+
+import numpy as np
+
+PNG_SIGNATURE = b"\x89PNG\r\n\x1a\n"
+EXR_MAGIC = 20000630
+EXR_FLOAT = 2
+
+
+# Writes a rendered image (height x width x 3, values in [0, 1]) to path, the format is chosen by
+# the extension: .npy keeps the raw floats, .raw writes them as bare little endian float32 rows,
+# .png (8 bit) and .exr (float32) are written directly, other formats go through matplotlib.
+def save_image(path: str, image):
+    match os.path.splitext(path)[1].lower():
+        case ".npy":
+            np.save(path, image)
+        case ".raw":
+            np.asarray(image, dtype="<f4").tofile(path)
+        case ".png":
+            write_png(path, image)
+        case ".exr":
+            write_exr(path, image)
+        case _:
+            import matplotlib.image  # only loaded when an image format is requested
+
+            matplotlib.image.imsave(path, np.clip(image, 0, 1))
+
+
+def _png_chunk(tag: bytes, data: bytes) -> bytes:
+    return struct.pack(">I", len(data)) + tag + data + struct.pack(">I", zlib.crc32(tag + data))
+
+
+# 8 bit RGB PNG, every row with filter type 0
+def write_png(path: str, image):
+    pixels = np.round(np.clip(image, 0, 1) * 255).astype(np.uint8)
+    height, width, _ = pixels.shape
+    rows = np.zeros((height, 1 + 3 * width), dtype=np.uint8)
+    rows[:, 1:] = pixels.reshape(height, -1)
+    with open(path, "wb") as f:
+        f.write(PNG_SIGNATURE)
+        f.write(_png_chunk(b"IHDR", struct.pack(">IIBBBBB", width, height, 8, 2, 0, 0, 0)))
+        f.write(_png_chunk(b"IDAT", zlib.compress(rows.tobytes())))
+        f.write(_png_chunk(b"IEND", b""))
+
+
+def _exr_attribute(name: str, kind: str, value: bytes) -> bytes:
+    return name.encode() + b"\0" + kind.encode() + b"\0" + struct.pack("<i", len(value)) + value
+
+
+# Uncompressed scanline OpenEXR with float32 R, G and B channels
+def write_exr(path: str, image):
+    pixels = np.asarray(image, dtype="<f4")
+    height, width, _ = pixels.shape
+    channels = b"".join(name + b"\0" + struct.pack("<iB3xii", EXR_FLOAT, 0, 1, 1) for name in (b"B", b"G", b"R"))
+    window = struct.pack("<iiii", 0, 0, width - 1, height - 1)
+    header = (
+        struct.pack("<ii", EXR_MAGIC, 2)
+        + _exr_attribute("channels", "chlist", channels + b"\0")
+        + _exr_attribute("compression", "compression", b"\0")
+        + _exr_attribute("dataWindow", "box2i", window)
+        + _exr_attribute("displayWindow", "box2i", window)
+        + _exr_attribute("lineOrder", "lineOrder", b"\0")
+        + _exr_attribute("pixelAspectRatio", "float", struct.pack("<f", 1))
+        + _exr_attribute("screenWindowCenter", "v2f", struct.pack("<ff", 0, 0))
+        + _exr_attribute("screenWindowWidth", "float", struct.pack("<f", 1))
+        + b"\0"
+    )
+    line_size = 3 * 4 * width
+    first_line = len(header) + 8 * height  # after the table of the offsets of the lines
+    offsets = np.arange(height, dtype="<u8") * (8 + line_size) + first_line
+    with open(path, "wb") as f:
+        f.write(header)
+        f.write(offsets.tobytes())
+        for y in range(height):
+            f.write(struct.pack("<ii", y, line_size))
+            f.write(pixels[y, :, ::-1].T.tobytes())  # the channels one after the other, in B, G, R order
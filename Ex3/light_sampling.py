@@ -0,0 +1,74 @@
+from typing import List, Sequence, Tuple
+
+from helper_classes import *
+
+
+# Stands in for the list of lights of a scene with many lights. At each hit point the
+# contribution of every light is estimated at once from its intensity, its attenuation
+# (kc, kl, kq) and its spot cone, ignoring shadows; the lights estimated below cutoff are
+# skipped and, when more than max_lights remain, max_lights of them are drawn with probability
+# proportional to their estimate and weighted so that the sum stays unbiased. Lights with a
+# negative estimate (points outside a spot cone) are skipped too.
+# The draws at a point come from a generator keyed by (seed, point), so they do not depend on the
+# order the points are shaded in: serial, tiled, parallel and cached renders pick the same lights.
+# Iterating over it yields all its lights, like the list it replaces.
+class LightSampler:
+    __slots__ = ("lights", "max_lights", "cutoff", "seed", "_power", "_positions", "_attenuation", "_spot", "_is_spot")
+
+    def __init__(self, lights: Sequence[LightSource], max_lights: int = 8, cutoff: float = 1e-3, seed: int = 0):
+        if max_lights < 1:
+            raise ValueError("max_lights must be at least 1")
+        self.lights = tuple(lights)
+        self.max_lights = max_lights
+        self.cutoff = cutoff
+        self.seed = seed
+        self.compile()
+
+    def __iter__(self):
+        return iter(self.lights)
+
+    def __len__(self):
+        return len(self.lights)
+
+    # Compiles the lights and gathers what the estimate needs in arrays, one row per light.
+    # Directional lights do not attenuate: position 0, kc 1 and no cone. The estimates are
+    # always computed in float64.
+    def compile(self, dtype=np.float64):
+        count = len(self.lights)
+        self._power = np.zeros(count)
+        self._positions = np.zeros((count, 3))
+        self._attenuation = np.tile([1.0, 0.0, 0.0], (count, 1))
+        self._spot = np.zeros((count, 3))
+        for i, light in enumerate(self.lights):
+            light.compile(dtype)
+            self._power[i] = np.max(light.intensity)
+            if isinstance(light, PointLight):
+                self._positions[i] = light.position
+                self._attenuation[i] = light.kc, light.kl, light.kq
+            if isinstance(light, SpotLight):
+                self._spot[i] = light.direction
+        self._is_spot = self._spot.any(axis=1)
+
+    # Estimated contribution of every light at point, shadows ignored
+    def estimate(self, point) -> np.ndarray:
+        to_light = self._positions - point
+        d = np.linalg.norm(to_light, axis=1)  # unused for directional lights (kl = kq = 0)
+        kc, kl, kq = self._attenuation.T
+        estimate = self._power / (kc + kl * d + kq * d * d)
+        with np.errstate(invalid="ignore", divide="ignore"):
+            cone = np.einsum("ij,ij->i", to_light, self._spot) / d
+        estimate[self._is_spot] *= cone[self._is_spot]
+        return estimate
+
+    # Returns the (light, weight) pairs to shade point with
+    def sample(self, point) -> List[Tuple[LightSource, float]]:
+        estimate = self.estimate(point)
+        candidates = np.flatnonzero(estimate > self.cutoff)
+        if len(candidates) <= self.max_lights:
+            return [(self.lights[i], 1) for i in candidates]
+        p = estimate[candidates] / estimate[candidates].sum()
+        key = np.ascontiguousarray(point, dtype=np.float64).view(np.uint64)
+        rng = np.random.default_rng([self.seed, *key.tolist()])
+        counts = np.bincount(rng.choice(len(candidates), size=self.max_lights, p=p), minlength=len(candidates))
+        chosen = np.flatnonzero(counts)
+        return [(self.lights[candidates[c]], counts[c] / (self.max_lights * p[c])) for c in chosen]
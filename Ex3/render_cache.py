@@ -0,0 +1,187 @@
+import hashlib
+import os
+import pickle
+from collections import OrderedDict
+from typing import Dict, Hashable, List, Optional, Tuple
+
+from hw3 import *
+
+# Slots that only change how an object looks, changing them keeps the scene geometry
+MATERIAL_SLOTS = frozenset(Object3D.__slots__)
+
+
+def _update_hash(h, value):
+    if isinstance(value, np.ndarray):
+        h.update(f"{value.dtype}{value.shape}".encode())
+        h.update(np.ascontiguousarray(value).tobytes())
+    elif isinstance(value, (list, tuple)):
+        h.update(b"[")
+        for v in value:
+            _update_hash(h, v)
+        h.update(b"]")
+    elif hasattr(type(value), "__slots__"):
+        h.update(type(value).__name__.encode())
+        for name in _slots(type(value)):
+            _update_hash(h, getattr(value, name, None))
+    else:
+        h.update(repr(value).encode())
+
+
+def _slots(cls) -> List[str]:
+    return [name for c in reversed(cls.__mro__) for name in getattr(c, "__slots__", ())]
+
+
+def value_hash(value) -> str:
+    h = hashlib.blake2b(digest_size=16)
+    _update_hash(h, value)
+    return h.hexdigest()
+
+
+# Returns the hashes of the geometry and of the material of an object.
+# A mesh hashes its triangles, so editing their materials changes the mesh material hash.
+def component_hashes(obj: Object3D) -> Tuple[str, str]:
+    geometry, material = hashlib.blake2b(digest_size=16), hashlib.blake2b(digest_size=16)
+    _update_hash(geometry, type(obj).__name__)
+    for name in _slots(type(obj)):
+        value = getattr(obj, name, None)
+        if name in MATERIAL_SLOTS:
+            _update_hash(material, value)
+        elif name == "triangle_list":
+            for t in value:
+                g, m = component_hashes(t)
+                geometry.update(g.encode())
+                material.update(m.encode())
+        else:
+            _update_hash(geometry, value)
+    return geometry.hexdigest(), material.hexdigest()
+
+
+# Maps every object that intersect can return to the index of the scene object that owns it.
+# Scene objects may nest others: accelerators (BVH, UniformGrid, EntryOrderedList) hold them in
+# objects, meshes in triangle_list and instances in geometry.
+def _component_owners(objects) -> Dict[int, int]:
+    owners = {}
+    for index, obj in enumerate(objects):
+        _add_owner(owners, obj, index)
+    return owners
+
+
+def _add_owner(owners: Dict[int, int], obj, index: int):
+    owners[id(obj)] = index
+    for child in [*getattr(obj, "objects", ()), *getattr(obj, "triangle_list", ())]:
+        _add_owner(owners, child, index)
+    if (geometry := getattr(obj, "geometry", None)) is not None:
+        _add_owner(owners, geometry, index)
+
+
+# LRU cache of rendered tiles, kept in memory and optionally written through to a directory.
+# Each entry is (tile pixels, {component key: component hash} of what the tile depended on).
+class TileCache:
+    def __init__(self, max_tiles: int = 4096, directory: Optional[str] = None, max_disk_tiles: int = 65536):
+        self.max_tiles = max_tiles
+        self.directory = directory
+        self.max_disk_tiles = max_disk_tiles
+        self._memory: "OrderedDict[str, tuple]" = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        if directory is not None:
+            os.makedirs(directory, exist_ok=True)
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.directory, f"{key}.tile")
+
+    def get(self, key: str):
+        if key in self._memory:
+            self._memory.move_to_end(key)
+            return self._memory[key]
+        if self.directory is not None and os.path.exists(path := self._path(key)):
+            with open(path, "rb") as f:
+                entry = pickle.load(f)
+            os.utime(path)  # the modification time orders the disk entries for eviction
+            self._remember(key, entry)
+            return entry
+        return None
+
+    def put(self, key: str, entry):
+        self._remember(key, entry)
+        if self.directory is not None:
+            with open(self._path(key), "wb") as f:
+                pickle.dump(entry, f, protocol=pickle.HIGHEST_PROTOCOL)
+            self._evict_disk()
+
+    def _remember(self, key: str, entry):
+        self._memory[key] = entry
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.max_tiles:
+            self._memory.popitem(last=False)
+
+    def _evict_disk(self):
+        entries = [e for e in os.scandir(self.directory) if e.name.endswith(".tile")]
+        if len(entries) <= self.max_disk_tiles:
+            return
+        entries.sort(key=lambda e: e.stat().st_mtime)
+        for e in entries[: len(entries) - self.max_disk_tiles]:
+            os.remove(e.path)
+
+    def clear(self):
+        self._memory.clear()
+
+
+# Renders the scene tile by tile, reusing the tiles of cache whose dependencies did not change.
+# A tile depends on the objects its rays hit and the lights they shaded with; editing the
+# material of an object or a light only re-traces the tiles that used it, while any change to
+# the geometry, camera, ambient light, render settings, number of lights or settings of a
+# LightSampler re-traces the whole frame (a light that was added is no dependency of any tile).
+def render_scene_incremental(
+    camera,
+    ambient,
+    lights,
+    objects,
+    screen_size,
+    max_depth,
+    render_model: RenderModel = RenderModel.default,
+    cache: Optional[TileCache] = None,
+    tile_size: int = 32,
+):
+    cache = TileCache() if cache is None else cache
+    scene = compile_scene(camera, ambient, lights, objects)
+    model_func = get_model_func(render_model)
+
+    current: Dict[Hashable, str] = {}
+    geometry = []
+    for index, obj in enumerate(scene.objects):
+        g, current[("object", index)] = component_hashes(obj)
+        geometry.append(g)
+    for index, light in enumerate(scene.lights):
+        current[("light", index)] = value_hash(light)
+    light_settings = [len(scene.lights)]
+    if isinstance(scene.lights, LightSampler):
+        light_settings += [scene.lights.max_lights, scene.lights.cutoff, scene.lights.seed]
+    frame_key = value_hash(
+        [scene.camera, scene.ambient, list(screen_size), max_depth, render_model.name, geometry, light_settings]
+    )
+
+    owners = _component_owners(scene.objects)
+    light_index = {id(light): index for index, light in enumerate(scene.lights)}
+    width, height = screen_size
+    image = np.zeros((height, width, 3))
+    for rows, cols in iter_tiles(screen_size, tile_size):
+        key = value_hash([frame_key, rows.start, rows.stop, cols.start, cols.stop])
+        entry = cache.get(key)
+        if entry is not None and all(current.get(k) == h for k, h in entry[1].items()):
+            cache.hits += 1
+            image[rows, cols] = entry[0]
+            continue
+        cache.misses += 1
+        touched = set()
+        tile = render_tile(scene, screen_size, max_depth, model_func, rows, cols, touched)
+        dependencies = {}
+        for item in touched:
+            if id(item) in light_index:
+                k = ("light", light_index[id(item)])
+            else:
+                k = ("object", owners[id(getattr(item, "instance", item))])
+            dependencies[k] = current[k]
+        cache.put(key, (tile, dependencies))
+        image[rows, cols] = tile
+    return image
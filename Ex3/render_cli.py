@@ -0,0 +1,199 @@
+"""Renders scene files without a notebook, run with ``python render_cli.py <command>``
+
+    python render_cli.py render scene.json out.png [--size 640x480] [--depth 4] [--float32]
+    python render_cli.py worker queue/
+
+The worker renders the jobs dropped in a queue directory, keeping the interpreter and the parsed
+OBJ meshes loaded between them. A job is a .job file holding a JSON object
+{"scene": "scene.json", "output": "out.exr"} that can also set size, depth, model, integrator,
+accelerator and float32 like the options of render; relative paths are relative to the queue
+directory. Publish a job atomically: write it under another name in the queue directory (e.g.
+name.job.tmp) and rename it to name.job once it is complete. A .job file that is not valid JSON is
+taken as still being written and tried again on the next scans; once it was left unchanged for
+JOB_SETTLE_SECONDS after a failed read it is taken as complete, and failed like a job that failed.
+"""
+
+import argparse
+import json
+import os
+import sys
+import time
+import traceback
+from typing import Dict, Optional, Tuple
+
+from acceleration import build_accelerator
+from hw3 import *
+from image_io import save_image
+from scene_file import MeshCache, load_scene
+from wavefront import render_wavefront
+
+INTEGRATORS = ("wavefront", "recursive")
+JOB_SUFFIX = ".job"
+JOB_SETTLE_SECONDS = 2.0
+
+
+# Renders the scene file at scene_path to output (see image_io.save_image for the formats).
+# size, depth, model and accelerator override the values of the scene file; the wavefront
+# integrator renders in float32 when float32 is set, the recursive one is render_scene (float64 only).
+def render_file(
+    scene_path: str,
+    output: str,
+    meshes: Optional[MeshCache] = None,
+    size=None,
+    depth: Optional[int] = None,
+    model: Optional[str] = None,
+    integrator: str = "wavefront",
+    accelerator: Optional[str] = None,
+    float32: bool = False,
+) -> str:
+    if integrator not in INTEGRATORS:
+        raise ValueError(f"Unknown integrator {integrator!r}, use one of {', '.join(INTEGRATORS)}")
+    if float32 and integrator != "wavefront":
+        raise ValueError("float32 is only supported by the wavefront integrator")
+    scene = load_scene(scene_path, meshes)
+    screen_size = tuple(size) if size is not None else scene.screen_size
+    max_depth = scene.max_depth if depth is None else depth
+    render_model = scene.render_model if model is None else RenderModel[model]
+    objects = scene.objects
+    if (kind := accelerator or scene.accelerator) is not None:
+        objects = build_accelerator(objects, kind)
+    if integrator == "wavefront":
+        dtype = np.float32 if float32 else np.float64
+        image = render_wavefront(
+            scene.camera, scene.ambient, scene.lights, objects, screen_size, max_depth, render_model, dtype=dtype
+        )
+    else:
+        image = render_scene(scene.camera, scene.ambient, scene.lights, objects, screen_size, max_depth, render_model)
+    save_image(output, image)
+    return output
+
+
+# Renders a job of the queue, the job was already claimed (renamed to .running)
+def _run_job(queue_dir: str, job: dict, meshes: MeshCache) -> dict:
+    options = {key: job[key] for key in ("size", "depth", "model", "integrator", "accelerator", "float32") if key in job}
+    start = time.perf_counter()
+    render_file(os.path.join(queue_dir, job["scene"]), os.path.join(queue_dir, job["output"]), meshes, **options)
+    return dict(job, seconds=time.perf_counter() - start)
+
+
+# The job object of a job file, raises ValueError (which UnicodeDecodeError and JSONDecodeError
+# are) if the file is not a JSON object
+def _read_job(path: str) -> dict:
+    with open(path, encoding="utf-8") as f:
+        job = json.load(f)
+    if not isinstance(job, dict):
+        raise ValueError("A job must be a JSON object")
+    return job
+
+
+# Claims the first waiting job of the queue by renaming it, which is atomic, so that several
+# workers can serve the same directory. unreadable maps the jobs that did not parse to the
+# (size, modification time) they had and when they were read. They are skipped while they change,
+# and claimed with their error once they were unchanged for settle seconds after a failed read.
+# Returns the path of the claimed job, the job (None if it did not parse) and the error, None if
+# no job waits.
+def _claim_job(
+    queue_dir: str, unreadable: Dict[str, Tuple[tuple, float]], settle: float
+) -> Optional[Tuple[str, Optional[dict], Optional[str]]]:
+    for name in sorted(os.listdir(queue_dir)):
+        if not name.endswith(JOB_SUFFIX):
+            continue
+        path = os.path.join(queue_dir, name)
+        job, error = None, None
+        try:
+            stat = os.stat(path)
+            version = (stat.st_size, stat.st_mtime_ns)
+            try:
+                job = _read_job(path)
+            except ValueError as e:
+                seen = unreadable.get(name)
+                if seen is None or seen[0] != version:
+                    unreadable[name] = (version, time.monotonic())
+                    continue
+                if time.monotonic() - seen[1] < settle:
+                    continue
+                error = f"{name} is not a valid job: {e!r}"
+            os.rename(path, path + ".running")
+        except FileNotFoundError:  # another worker claimed it first
+            continue
+        unreadable.pop(name, None)
+        return path + ".running", job, error
+    return None
+
+
+# Serves the jobs of queue_dir until max_jobs were run (forever when None), polling the directory
+# every poll_interval seconds when it is empty. Each finished job is rewritten as <job>.done with
+# its render time, or as <job>.failed with the error. Returns the number of jobs run.
+# Job files that are not valid JSON are reported once, and failed once they stopped changing for
+# settle seconds (see _claim_job).
+def run_worker(
+    queue_dir: str,
+    poll_interval: float = 0.5,
+    max_jobs: Optional[int] = None,
+    meshes: Optional[MeshCache] = None,
+    settle: float = JOB_SETTLE_SECONDS,
+) -> int:
+    meshes = MeshCache() if meshes is None else meshes
+    jobs = 0
+    unreadable, reported = {}, set()
+    while max_jobs is None or jobs < max_jobs:
+        claimed = _claim_job(queue_dir, unreadable, settle)
+        for name in unreadable.keys() - reported:
+            print(f"{name} is not valid JSON, skipped while it is being written", file=sys.stderr, flush=True)
+        reported = set(unreadable)
+        if claimed is None:
+            time.sleep(poll_interval)
+            continue
+        running_path, job, error = claimed
+        job_path = running_path[: -len(".running")]
+        if error is not None:
+            result, suffix = {"error": error}, ".failed"
+        else:
+            try:
+                result, suffix = _run_job(queue_dir, job, meshes), ".done"
+            except Exception:
+                result, suffix = {"error": traceback.format_exc()}, ".failed"
+        with open(job_path + suffix, "w") as f:
+            json.dump(result, f, indent=2)
+        os.remove(running_path)
+        jobs += 1
+        print(f"{os.path.basename(job_path)}{suffix}", flush=True)
+    return jobs
+
+
+def _size(text: str):
+    width, height = text.lower().split("x")
+    return int(width), int(height)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    sub = parser.add_subparsers(dest="command", required=True)
+    render = sub.add_parser("render", help="render a scene file to an image")
+    render.add_argument("scene", help="JSON scene file, see scene_file.py")
+    render.add_argument("output", help="output image: .png, .exr, .raw (float32), .npy or any matplotlib format")
+    render.add_argument("--size", type=_size, help="WIDTHxHEIGHT, overrides the scene file")
+    render.add_argument("--depth", type=int, help="maximum recursion depth, overrides the scene file")
+    render.add_argument("--model", choices=[model.name for model in RenderModel], help="overrides the scene file")
+    render.add_argument("--integrator", choices=INTEGRATORS, default="wavefront")
+    render.add_argument("--accelerator", choices=("bvh", "grid", "ordered"), help="overrides the scene file")
+    render.add_argument("--float32", action="store_true", help="single precision (wavefront integrator)")
+    worker = sub.add_parser("worker", help="render the jobs of a queue directory")
+    worker.add_argument("queue_dir")
+    worker.add_argument("--poll", type=float, default=0.5, help="seconds between scans of an empty queue")
+    worker.add_argument("--max-jobs", type=int, help="exit after this many jobs (default: run forever)")
+    args = parser.parse_args(argv)
+    if args.command == "render" and args.float32 and args.integrator != "wavefront":
+        parser.error("--float32 requires --integrator wavefront")
+    if args.command == "render":
+        options = {key: getattr(args, key) for key in ("size", "depth", "model", "integrator", "accelerator", "float32")}
+        start = time.perf_counter()
+        render_file(args.scene, args.output, **options)
+        print(f"{args.output} rendered in {time.perf_counter() - start:.2f}s")
+    else:
+        os.makedirs(args.queue_dir, exist_ok=True)
+        run_worker(args.queue_dir, args.poll, args.max_jobs)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
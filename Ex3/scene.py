@@ -0,0 +1,46 @@
+import copy
+from typing import NamedTuple, Sequence, Tuple, Union
+
+from helper_classes import *
+from light_sampling import LightSampler
+
+
+# A validated scene whose objects and lights had their invariants precomputed.
+# Built once by compile_scene and handed to the renderer.
+class Scene(NamedTuple):
+    camera: np.ndarray
+    ambient: np.ndarray
+    lights: Union[Tuple[LightSource, ...], LightSampler]
+    objects: Tuple[Object3D, ...]
+
+
+# lights can be a LightSampler, which is kept to select the lights of each hit point.
+# dtype is the precision the geometry, materials and lights are stored in: float64, or float32
+# for render_wavefront in single precision. Compiling converts the stored values and makes them
+# read-only, so copies of the lights and objects are compiled and the caller's scene can still
+# be edited. in_place compiles the given ones instead, for callers that already made copies.
+def compile_scene(
+    camera,
+    ambient,
+    lights: Sequence[LightSource],
+    objects: Sequence[Object3D],
+    dtype=np.float64,
+    in_place: bool = False,
+) -> Scene:
+    camera = frozen_vector(camera, dtype)
+    ambient = frozen_vector(ambient, dtype)
+    if camera.shape != (3,):
+        raise ValueError("The camera must be a 3D point")
+    if ambient.shape != (3,):
+        raise ValueError("The ambient light must be an RGB triplet")
+    if not in_place:
+        lights, objects = copy.deepcopy((lights, list(objects)))
+    if isinstance(lights, LightSampler):
+        lights.compile(dtype)
+    else:
+        for light in lights:
+            light.compile(dtype)
+        lights = tuple(lights)
+    for obj in objects:
+        obj.compile(dtype)
+    return Scene(camera, ambient, lights, tuple(objects))
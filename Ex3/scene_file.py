@@ -0,0 +1,140 @@
+import copy
+import json
+import os
+from typing import Any, Dict, List, NamedTuple, Optional, Tuple
+
+from helper_classes import *
+from hw3 import RenderModel
+
+# A scene file is a JSON object:
+# {
+#   "camera": [0, 0, 1], "ambient": [0.1, 0.1, 0.1],
+#   "screen_size": [256, 192], "max_depth": 3, "render_model": "phong", "accelerator": "bvh",
+#   "materials": {"red": {"ambient": [...], "diffuse": [...], "specular": [...], "shininess": 100,
+#                         "reflection": 0.5, "refraction": 0.3, "refraction_index": 1.5}},
+#   "lights": [{"type": "point", "intensity": [...], "position": [...], "kc": 0.1, "kl": 0.1, "kq": 0.1},
+#              {"type": "spot", ..., "direction": [...]}, {"type": "directional", "intensity": [...], "direction": [...]}],
+#   "objects": [{"type": "sphere", "center": [...], "radius": 0.5, "material": "red"},
+#               {"type": "plane", "normal": [...], "point": [...], "material": {...}},
+#               {"type": "triangle", "a": [...], "b": [...], "c": [...], "material": "red"},
+#               {"type": "mesh", "vertices": [[...], ...], "faces": [[0, 1, 2], ...], "material": "red"},
+#               {"type": "obj", "path": "model.obj", "material": "red"},
+#               {"type": "instance", "geometry": {<object>}, "translation": [...], "rotation_z": 30, "scale": 0.5,
+#                "material": "red"}]
+# }
+# A material is the name of an entry of "materials" or an inline material. "obj" paths are
+# relative to the scene file. screen_size, max_depth, render_model and accelerator are optional.
+
+MATERIAL_FIELDS = ("ambient", "diffuse", "specular", "shininess", "reflection", "refraction", "refraction_index")
+
+
+class SceneDescription(NamedTuple):
+    camera: np.ndarray
+    ambient: np.ndarray
+    lights: List[LightSource]
+    objects: List[Object3D]
+    screen_size: Tuple[int, int]
+    max_depth: int
+    render_model: RenderModel
+    accelerator: Optional[str]
+
+
+# Meshes of OBJ files by path, reused while the file is unchanged. Parsing the file and building
+# the triangles is most of the cost of loading a large mesh; every load gets its own copy of the
+# Mesh and of its triangles since the materials can differ. The copies share the vertex arrays,
+# which are only ever replaced, not edited in place.
+class MeshCache:
+    def __init__(self):
+        self._meshes: Dict[str, Tuple[float, Mesh]] = {}
+        self.hits = 0
+        self.misses = 0
+
+    def load(self, path: str) -> Mesh:
+        path = os.path.abspath(path)
+        mtime = os.path.getmtime(path)
+        cached = self._meshes.get(path)
+        if cached is not None and cached[0] == mtime:
+            self.hits += 1
+        else:
+            self.misses += 1
+            cached = self._meshes[path] = (mtime, read_obj(path))
+        mesh = copy.copy(cached[1])
+        mesh.triangle_list = [copy.copy(t) for t in mesh.triangle_list]
+        return mesh
+
+
+def _material(spec, materials: Dict[str, Any]) -> Dict[str, Any]:
+    if isinstance(spec, str):
+        if spec not in materials:
+            raise ValueError(f"Unknown material {spec!r}")
+        spec = materials[spec]
+    missing = [field for field in MATERIAL_FIELDS[:5] if field not in spec]
+    if missing:
+        raise ValueError(f"Material is missing {', '.join(missing)}")
+    return {field: spec[field] for field in MATERIAL_FIELDS if field in spec}
+
+
+def _light(spec) -> LightSource:
+    match spec.get("type"):
+        case "directional":
+            return DirectionalLight(np.array(spec["intensity"]), np.array(spec["direction"]))
+        case "point":
+            return PointLight(np.array(spec["intensity"]), np.array(spec["position"]), spec["kc"], spec["kl"], spec["kq"])
+        case "spot":
+            return SpotLight(
+                np.array(spec["intensity"]),
+                np.array(spec["position"]),
+                np.array(spec["direction"]),
+                spec["kc"],
+                spec["kl"],
+                spec["kq"],
+            )
+        case other:
+            raise ValueError(f"Unknown light type {other!r}")
+
+
+def _object(spec, materials: Dict[str, Any], base_dir: str, meshes: MeshCache) -> Object3D:
+    match spec.get("type"):
+        case "sphere":
+            obj = Sphere(spec["center"], spec["radius"])
+        case "plane":
+            obj = Plane(spec["normal"], spec["point"])
+        case "triangle":
+            obj = Triangle(spec["a"], spec["b"], spec["c"])
+        case "mesh":
+            obj = Mesh(np.array(spec["vertices"], dtype=np.float64), np.array(spec["faces"], dtype=int))
+        case "obj":
+            obj = meshes.load(os.path.join(base_dir, spec["path"]))
+        case "instance":
+            geometry = _object(dict(spec["geometry"], material=None), materials, base_dir, meshes)
+            transform = transform_matrix(spec.get("translation", (0, 0, 0)), spec.get("rotation_z", 0), spec.get("scale", 1))
+            obj = Instance(geometry, transform)
+        case other:
+            raise ValueError(f"Unknown object type {other!r}")
+    if spec.get("material") is not None:
+        obj.set_material(**_material(spec["material"], materials))
+        if isinstance(obj, Mesh):
+            obj.apply_materials_to_triangles()
+    return obj
+
+
+# Builds the scene described by a parsed scene file, base_dir is where "obj" paths are relative to
+def scene_from_dict(data: Dict[str, Any], base_dir: str = ".", meshes: Optional[MeshCache] = None) -> SceneDescription:
+    meshes = MeshCache() if meshes is None else meshes
+    materials = data.get("materials", {})
+    return SceneDescription(
+        camera=np.array(data["camera"], dtype=np.float64),
+        ambient=np.array(data.get("ambient", (0, 0, 0)), dtype=np.float64),
+        lights=[_light(spec) for spec in data.get("lights", [])],
+        objects=[_object(spec, materials, base_dir, meshes) for spec in data.get("objects", [])],
+        screen_size=tuple(data.get("screen_size", (256, 256))),
+        max_depth=data.get("max_depth", 3),
+        render_model=RenderModel[data.get("render_model", RenderModel.default.name)],
+        accelerator=data.get("accelerator"),
+    )
+
+
+def load_scene(path: str, meshes: Optional[MeshCache] = None) -> SceneDescription:
+    with open(path) as f:
+        data = json.load(f)
+    return scene_from_dict(data, os.path.dirname(os.path.abspath(path)), meshes)
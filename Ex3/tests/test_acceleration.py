@@ -0,0 +1,18 @@
+from acceleration import UniformGrid
+from hw3 import *
+
+
+def test_uniform_grid_finds_the_nearest_hit_of_a_linear_scan():
+    rng = np.random.default_rng(0)
+    spheres = [Sphere(center, 0.08) for center in rng.uniform(-1, 1, size=(300, 3))]
+    grid = UniformGrid(spheres)
+    origins = np.r_[rng.uniform(-1, 1, size=(100, 3)) * [1, 1, 0] + [0, 0, 2], rng.uniform(-1, 1, size=(100, 3))]
+    directions = rng.uniform(-1, 1, size=(200, 3))
+    directions[::10] = [0, 0, -1]  # axis aligned, the other axes are never crossed
+    for origin, direction in zip(origins, directions):
+        ray = Ray(origin, direction)
+        expected_t, expected = ray.nearest_intersected_object(spheres)
+        t, found = grid.intersect(ray)
+        assert found is expected
+        if expected is not None:
+            assert t == expected_t
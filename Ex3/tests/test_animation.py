@@ -0,0 +1,26 @@
+from animation import render_sequence
+from hw3 import *
+
+SCREEN_SIZE = (16, 12)
+
+
+def test_render_sequence_leaves_the_scene_unchanged(tmp_path):
+    camera, lights, objects, ambient = your_own_scene()
+    sphere = objects[-1]
+    center = sphere.center.copy()
+    cameras = [camera, camera + [0.1, 0, 0], camera + [0.2, 0, 0]]
+    transforms = {sphere: lambda frame: np.array([0.1 * frame, 0, 0])}
+    serial = render_sequence(
+        cameras, ambient, lights, objects, SCREEN_SIZE, 2, str(tmp_path / "serial"), transforms=transforms, workers=0
+    )
+    np.testing.assert_array_equal(sphere.center, center)
+
+    pooled = render_sequence(
+        cameras, ambient, lights, objects, SCREEN_SIZE, 2, str(tmp_path / "pooled"), transforms=transforms, workers=2
+    )
+    for a, b in zip(serial, pooled):
+        np.testing.assert_array_equal(np.load(a), np.load(b))
+    last = np.load(serial[-1])
+    sphere.translate([0.2, 0, 0])
+    expected = render_scene(cameras[-1], ambient, lights, objects, SCREEN_SIZE, 2)
+    np.testing.assert_allclose(last, expected, atol=1e-12)
@@ -0,0 +1,23 @@
+import pytest
+
+from framebuffer import open_framebuffer, render_to_framebuffer
+from hw3 import *
+
+SCREEN_SIZE = (20, 14)
+
+
+def test_workers_write_every_tile_of_a_float16_framebuffer(tmp_path):
+    camera, lights, objects, ambient = your_own_scene()
+    path = render_to_framebuffer(
+        camera, ambient, lights, objects, SCREEN_SIZE, 2, str(tmp_path / "frame.npy"), dtype=np.float16, tile_size=8, workers=2
+    )
+    image = np.load(path)
+    assert image.dtype == np.float16
+    assert image.shape == (14, 20, 3)
+    expected = render_scene(camera, ambient, lights, objects, SCREEN_SIZE, 2)
+    np.testing.assert_allclose(image, expected, atol=1e-3)
+
+
+def test_unsupported_framebuffer_dtype(tmp_path):
+    with pytest.raises(ValueError):
+        open_framebuffer(str(tmp_path / "frame.npy"), SCREEN_SIZE, np.int16, mode="w+")
@@ -0,0 +1,11 @@
+import os
+import subprocess
+import sys
+
+EX3_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def test_star_import_binds_plt_lazily():
+    code = "from hw3 import *; import sys; assert 'matplotlib' not in sys.modules; print(type(plt).__name__)"
+    result = subprocess.run([sys.executable, "-c", code], cwd=EX3_DIR, check=True, capture_output=True, text=True)
+    assert result.stdout.strip() == "_LazyPyplot"
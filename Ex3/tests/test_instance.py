@@ -0,0 +1,34 @@
+from hw3 import *
+
+VERTICES = np.array([[0.0, 0, 0], [1, 0, 0.5], [0, 1, 0.5]])
+
+
+def instanced_and_world_meshes():
+    transform = transform_matrix((0.2, -0.1, -2), 30, (1.5, 0.5, 1))
+    instance = Instance(Mesh(VERTICES, [[0, 1, 2]]), transform)
+    instance.set_material([0.1, 0.2, 0.3], [0.4, 0.5, 0.6], [1, 1, 1], 20, 0.25)
+    world = np.c_[VERTICES, np.ones(3)] @ transform.T
+    reference = Triangle(*world[:, :3])
+    return instance, reference
+
+
+def test_instance_hits_have_world_normals_and_the_instance_material():
+    instance, reference = instanced_and_world_meshes()
+    instance.compile()
+    center = (reference.a + reference.b + reference.c) / 3
+    ray = Ray(np.zeros(3), center)
+    t, hit = instance.intersect(ray)
+    assert isinstance(hit, InstanceHit)
+    expected_t, _ = reference.intersect(ray)
+    np.testing.assert_allclose(t, expected_t)
+    point = ray.origin + t * ray.direction
+    normal = hit.normal(point)
+    np.testing.assert_allclose(normal, reference.normal(point), atol=1e-12)
+    np.testing.assert_array_equal(hit.diffuse, instance.diffuse)
+    assert hit.shininess == 20 and hit.reflection == 0.25
+
+
+def test_instance_misses_outside_its_geometry():
+    instance, reference = instanced_and_world_meshes()
+    instance.compile()
+    assert instance.intersect(Ray(np.zeros(3), reference.a + [3, 3, 0]))[1] is None
@@ -0,0 +1,37 @@
+from hw3 import *
+from render_cache import TileCache, render_scene_incremental
+
+SCREEN_SIZE = (24, 16)
+
+
+def many_lights_scene(seed=0):
+    camera, _, objects, ambient = your_own_scene()
+    rng = np.random.default_rng(41)
+    lights = [
+        PointLight(rng.uniform(0.1, 0.5, 3), rng.uniform([-2, -1, -2], [2, 2, 1]), 0.1, 0.1, 0.1) for _ in range(20)
+    ]
+    return camera, LightSampler(lights, max_lights=2, seed=seed), objects, ambient
+
+
+def test_samples_do_not_depend_on_the_order():
+    _, sampler, _, _ = many_lights_scene()
+    points = np.random.default_rng(0).uniform(-1, 1, (5, 3))
+    first = [sampler.sample(p) for p in points]
+    second = [sampler.sample(p) for p in points[::-1]][::-1]
+    for a, b in zip(first, second):
+        assert [(id(light), weight) for light, weight in a] == [(id(light), weight) for light, weight in b]
+
+
+def test_tiled_renders_match_a_whole_render():
+    camera, sampler, objects, ambient = many_lights_scene()
+    expected = render_scene(camera, ambient, sampler, objects, SCREEN_SIZE, 2)
+    for tile_size in (4, 8):
+        image = render_scene_incremental(camera, ambient, sampler, objects, SCREEN_SIZE, 2, cache=TileCache(), tile_size=tile_size)
+        np.testing.assert_allclose(image, expected, atol=1e-12)
+
+
+def test_seed_changes_the_samples():
+    camera, sampler, objects, ambient = many_lights_scene()
+    other = LightSampler(sampler.lights, max_lights=2, seed=1)
+    first = render_scene(camera, ambient, sampler, objects, SCREEN_SIZE, 1)
+    assert not np.allclose(first, render_scene(camera, ambient, other, objects, SCREEN_SIZE, 1))
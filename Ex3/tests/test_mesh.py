@@ -0,0 +1,36 @@
+from hw3 import *
+
+VERTICES = [[-0.5, -0.5, -2], [0.5, -0.5, -2], [0, 0.5, -2], [0, 0, -2.5]]
+FACES = [[0, 1, 2], [0, 1, 3], [1, 2, 3], [2, 0, 3]]
+
+
+def material_mesh():
+    mesh = Mesh(VERTICES, FACES)
+    mesh.set_material([0.1, 0.1, 0.1], [0.5, 0.4, 0.3], [1, 1, 1], 10, 0.2)
+    mesh.apply_materials_to_triangles()
+    mesh.compile()
+    return mesh
+
+
+def test_assigning_vertices_moves_the_triangles_and_the_bounds():
+    mesh = material_mesh()
+    toward_old = Ray(np.zeros(3), [0, 0, -1])
+    toward_new = Ray(np.zeros(3), [3, 0, -2])
+    assert mesh.intersect(toward_old)[1] is not None
+    mesh.v_list = np.array(VERTICES) + [3, 0, 0]
+    assert mesh.misses(toward_old)
+    assert mesh.intersect(toward_old) == (None, None)
+    t, triangle = mesh.intersect(toward_new)
+    assert triangle in mesh.triangle_list
+    np.testing.assert_allclose(t, np.linalg.norm([3, 0, -2]))
+    np.testing.assert_array_equal(triangle.diffuse, [0.5, 0.4, 0.3])
+    np.testing.assert_array_equal(mesh.bounds()[0], [2.5, -0.5, -2.5])
+    for t, (p1, p2, p3) in zip(mesh.triangle_list, FACES):
+        np.testing.assert_array_equal([t.a, t.b, t.c], mesh.v_list[[p1, p2, p3]])
+
+
+def test_translate_moves_the_triangles_once():
+    mesh = material_mesh()
+    mesh.translate([0, 1, 0])
+    np.testing.assert_array_equal(mesh.triangle_list[0].a, [-0.5, 0.5, -2])
+    np.testing.assert_array_equal(mesh.bounds()[1], [0.5, 1.5, -2])
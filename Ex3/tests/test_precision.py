@@ -0,0 +1,35 @@
+from hw3 import *
+from wavefront import render_wavefront
+
+SCREEN_SIZE = (24, 16)
+
+
+def test_float32_render_leaves_the_scene_in_float64():
+    camera, lights, objects, ambient = your_own_scene()
+    clean = render_wavefront(camera, ambient, lights, objects, SCREEN_SIZE, 2)
+    sphere = objects[-1]
+    center = sphere.center.copy()
+    single = render_wavefront(camera, ambient, lights, objects, SCREEN_SIZE, 2, dtype=np.float32)
+    assert single.dtype == np.float32
+    assert sphere.center.dtype == np.float64
+    np.testing.assert_array_equal(sphere.center, center)
+    np.testing.assert_array_equal(render_wavefront(camera, ambient, lights, objects, SCREEN_SIZE, 2), clean)
+
+
+def test_float32_instances_stay_in_float32():
+    camera, lights, _, ambient = your_own_scene()
+    geometry = Mesh([[0, 0, 0], [1, 0, 0], [0, 1, 0]], [[0, 1, 2]])
+    instance = Instance(geometry, transform_matrix((-0.3, -0.2, -1), 30, 0.8))
+    instance.set_material([0.5, 0.2, 0.2], [0.5, 0.2, 0.2], [1, 1, 1], 10, 0.5)
+    floor = Plane([0, 1, 0], [0, -1, 0])
+    floor.set_material([0.2, 0.2, 0.2], [0.2, 0.2, 0.2], [1, 1, 1], 1000, 0.5)
+    objects = [instance, floor]
+    single = render_wavefront(camera, ambient, lights, objects, SCREEN_SIZE, 2, dtype=np.float32)
+    double = render_wavefront(camera, ambient, lights, objects, SCREEN_SIZE, 2)
+    assert np.abs(single - double).max() < 1e-3
+    assert instance._inverse.dtype == np.float64
+
+    scene = compile_scene(camera, ambient, lights, objects, np.float32)
+    compiled = scene.objects[0]
+    assert compiled._inverse.dtype == compiled._normal_matrix.dtype == np.float32
+    assert compiled.geometry.triangle_list[0].v_ab.dtype == np.float32
@@ -0,0 +1,47 @@
+from acceleration import BVH
+from hw3 import *
+from render_cache import TileCache, render_scene_incremental
+
+SCREEN_SIZE = (32, 24)
+MAX_DEPTH = 2
+
+
+def render_twice(edit):
+    camera, lights, objects, ambient = your_own_scene()
+    cache = TileCache()
+    render_scene_incremental(camera, ambient, lights, objects, SCREEN_SIZE, MAX_DEPTH, cache=cache, tile_size=8)
+    lights = edit(lights)
+    image = render_scene_incremental(camera, ambient, lights, objects, SCREEN_SIZE, MAX_DEPTH, cache=cache, tile_size=8)
+    return image, render_scene(camera, ambient, lights, objects, SCREEN_SIZE, MAX_DEPTH)
+
+
+def test_unchanged_scene_reuses_every_tile():
+    camera, lights, objects, ambient = your_own_scene()
+    cache = TileCache()
+    first = render_scene_incremental(camera, ambient, lights, objects, SCREEN_SIZE, MAX_DEPTH, cache=cache, tile_size=8)
+    second = render_scene_incremental(camera, ambient, lights, objects, SCREEN_SIZE, MAX_DEPTH, cache=cache, tile_size=8)
+    assert cache.hits == 12
+    np.testing.assert_array_equal(first, second)
+
+
+def test_added_light_invalidates_tiles():
+    red = PointLight(np.array([1, 0, 0]), np.array([0, 1, 1]), 0.1, 0.1, 0.1)
+    image, expected = render_twice(lambda lights: lights + [red])
+    np.testing.assert_allclose(image, expected, atol=1e-12)
+
+
+def test_reordered_lights_invalidate_tiles():
+    image, expected = render_twice(lambda lights: lights[::-1])
+    np.testing.assert_allclose(image, expected, atol=1e-12)
+
+
+def test_accelerated_scene_renders_incrementally():
+    camera, lights, objects, ambient = your_own_scene()
+    bounded = [obj for obj in objects if obj.bounds() is not None]
+    objects = [obj for obj in objects if obj.bounds() is None] + [BVH(bounded, leaf_size=1)]
+    cache = TileCache()
+    first = render_scene_incremental(camera, ambient, lights, objects, SCREEN_SIZE, MAX_DEPTH, cache=cache, tile_size=8)
+    second = render_scene_incremental(camera, ambient, lights, objects, SCREEN_SIZE, MAX_DEPTH, cache=cache, tile_size=8)
+    assert cache.hits == 12
+    np.testing.assert_array_equal(first, second)
+    np.testing.assert_allclose(first, render_scene(camera, ambient, lights, objects, SCREEN_SIZE, MAX_DEPTH), atol=1e-12)
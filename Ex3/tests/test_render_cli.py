@@ -0,0 +1,72 @@
+import json
+import os
+import shutil
+
+import numpy as np
+import pytest
+
+from render_cli import main, render_file, run_worker
+from scene_file import MeshCache
+
+SCENE = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "scenes", "spheres.json")
+
+
+def publish(queue, name, job):
+    tmp = queue / f"{name}.job.tmp"
+    tmp.write_text(json.dumps(job))
+    os.rename(tmp, queue / f"{name}.job")
+
+
+def test_worker_skips_jobs_still_being_written(tmp_path):
+    shutil.copy(SCENE, tmp_path / "scene.json")
+    job = {"scene": "scene.json", "size": [16, 12], "depth": 1}
+    partial = json.dumps(dict(job, output="a.npy"))
+    (tmp_path / "a.job").write_text(partial[: len(partial) // 2])
+    publish(tmp_path, "b", dict(job, output="b.npy"))
+
+    assert run_worker(str(tmp_path), poll_interval=0, max_jobs=1) == 1
+    assert (tmp_path / "b.job.done").exists() and (tmp_path / "b.npy").exists()
+    assert (tmp_path / "a.job").read_text() == partial[: len(partial) // 2]
+
+    (tmp_path / "a.job").write_text(partial)
+    assert run_worker(str(tmp_path), poll_interval=0, max_jobs=1) == 1
+    assert (tmp_path / "a.job.done").exists() and (tmp_path / "a.npy").exists()
+    assert not (tmp_path / "a.job").exists()
+
+
+def test_invalid_job_fails(tmp_path):
+    publish(tmp_path, "c", {"output": "c.npy"})
+    assert run_worker(str(tmp_path), poll_interval=0, max_jobs=1) == 1
+    assert "KeyError" in json.loads((tmp_path / "c.job.failed").read_text())["error"]
+
+
+def test_stable_job_that_is_not_json_fails(tmp_path):
+    shutil.copy(SCENE, tmp_path / "scene.json")
+    (tmp_path / "a.job").write_bytes(b"\xff\xfe not json")
+    publish(tmp_path, "b", {"scene": "scene.json", "output": "b.npy", "size": [8, 6], "depth": 1})
+    assert run_worker(str(tmp_path), poll_interval=0, max_jobs=2, settle=0) == 2
+    assert (tmp_path / "b.job.done").exists()
+    assert "not a valid job" in json.loads((tmp_path / "a.job.failed").read_text())["error"]
+    assert not (tmp_path / "a.job").exists()
+
+
+def test_float32_requires_the_wavefront_integrator(tmp_path):
+    with pytest.raises(ValueError):
+        render_file(SCENE, str(tmp_path / "out.npy"), integrator="recursive", float32=True)
+    with pytest.raises(SystemExit):
+        main(["render", SCENE, str(tmp_path / "out.npy"), "--integrator", "recursive", "--float32"])
+    assert not (tmp_path / "out.npy").exists()
+
+
+def test_mesh_cache_reuses_the_built_mesh(tmp_path):
+    path = tmp_path / "quad.obj"
+    path.write_text("v 0 0 -2\nv 1 0 -2\nv 1 1 -2\nv 0 1 -2\nf 1 2 3\nf 1 3 4\n")
+    meshes = MeshCache()
+    first, second = meshes.load(str(path)), meshes.load(str(path))
+    assert (meshes.hits, meshes.misses) == (1, 1)
+    assert first is not second
+    assert not {id(t) for t in first.triangle_list} & {id(t) for t in second.triangle_list}
+    first.set_material([1, 0, 0], [1, 0, 0], [1, 1, 1], 10, 0)
+    first.apply_materials_to_triangles()
+    assert not hasattr(second.triangle_list[0], "ambient")
+    np.testing.assert_array_equal(second.triangle_list[1].c, [0, 1, -2])
@@ -0,0 +1,27 @@
+import pytest
+
+from hw3 import *
+from wavefront import render_wavefront
+
+SCREEN_SIZE = (16, 12)
+
+
+def test_compiling_leaves_the_scene_editable():
+    camera, lights, objects, ambient = your_own_scene()
+    sphere = objects[-1]
+    first = render_scene(camera, ambient, lights, objects, SCREEN_SIZE, 2)
+    render_wavefront(camera, ambient, lights, objects, SCREEN_SIZE, 2)
+    sphere.center[0] += 0.1
+    sphere.diffuse[1] = 0.9
+    lights[0].intensity[0] = 0.5
+    sphere.precompute()
+    edited = render_scene(camera, ambient, lights, objects, SCREEN_SIZE, 2)
+    assert np.abs(edited - first).max() > 0
+
+    scene = compile_scene(camera, ambient, lights, objects)
+    compiled = scene.objects[-1]
+    assert compiled is not sphere
+    with pytest.raises(ValueError):
+        compiled.center[0] = 0
+    with pytest.raises(ValueError):
+        compiled.diffuse[0] = 0
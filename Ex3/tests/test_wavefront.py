@@ -0,0 +1,24 @@
+from hw3 import *
+from wavefront import render_wavefront
+
+SCREEN_SIZE = (16, 12)
+
+
+def scene_of(sphere):
+    sphere.set_material([0.1, 0.1, 0.1], [0.6, 0.2, 0.2], [0.5, 0.5, 0.5], 50, 0.5)
+    lights = [PointLight(np.array([1, 1, 1]), np.array([1, 1, 1]), 0.1, 0.1, 0.1)]
+    return np.array([0, 0, 1]), np.array([0.1, 0.1, 0.1]), lights, [sphere]
+
+
+def test_reflections_that_all_leave_the_scene():
+    camera, ambient, lights, objects = scene_of(Sphere([0, 0, -1], 0.5))
+    image = render_wavefront(camera, ambient, lights, objects, SCREEN_SIZE, 3)
+    np.testing.assert_allclose(image, render_scene(camera, ambient, lights, objects, SCREEN_SIZE, 3), atol=1e-12)
+    assert image.any()
+
+
+def test_camera_that_sees_nothing():
+    camera, ambient, lights, objects = scene_of(Sphere([0, 0, 3], 0.5))  # behind the camera
+    image = render_wavefront(camera, ambient, lights, objects, SCREEN_SIZE, 3, dtype=np.float32)
+    assert image.shape == (12, 16, 3)
+    assert not image.any()
@@ -0,0 +1,199 @@
+from typing import Callable, List, NamedTuple, Tuple
+
+from hw3 import *
+
+MORTON_BITS = 10  # per axis, the codes fit in 30 bits
+
+
+# Batched version of the functions of get_model_func, the arguments are (N, 3) arrays of
+# normals, ray directions, directions to the light and reflected directions, and the (N,)
+# shininess of the hit objects
+def get_batch_model_func(render_model: RenderModel) -> Callable:
+    match render_model:
+        case RenderModel.blinn_phong:
+            def blinn_phong(n, D, L, V, a):
+                H = L - D
+                H /= np.linalg.norm(H, axis=1)[:, None]
+                return row_dot(H, n) ** (a / 4)
+
+            return blinn_phong
+        case RenderModel.phong:
+            return lambda n, D, L, V, a: row_dot(L, V) ** a
+
+
+# Interleaves the bits of three integer coordinates below 2 ** MORTON_BITS
+def morton_codes(cells) -> np.ndarray:
+    codes = np.zeros(len(cells), dtype=np.uint64)
+    cells = cells.astype(np.uint64)
+    for bit in range(MORTON_BITS):
+        for axis in range(3):
+            codes |= ((cells[:, axis] >> np.uint64(bit)) & np.uint64(1)) << np.uint64(3 * bit + axis)
+    return codes
+
+
+# Order that groups the rays by direction octant, then by the Morton code of their origin in the
+# box of all the origins, so that consecutive rays travel the same way from nearby points
+def coherence_order(origins, directions) -> np.ndarray:
+    lo, hi = origins.min(axis=0), origins.max(axis=0)
+    scale = (2**MORTON_BITS - 1) / np.maximum(hi - lo, EPSILON)
+    cells = ((origins - lo) * scale).astype(np.int64)
+    octants = ((directions > 0) * [4, 2, 1]).sum(axis=1).astype(np.uint64)
+    return np.argsort(octants << np.uint64(3 * MORTON_BITS) | morton_codes(cells), kind="stable")
+
+
+# The rays of one bounce, one row per ray
+class RayBatch(NamedTuple):
+    origins: np.ndarray
+    directions: np.ndarray
+    refraction_index: np.ndarray
+    throughput: np.ndarray  # weight of the ray in its pixel: the product of the reflection/refraction factors
+    pixels: np.ndarray  # flat index of the pixel the ray contributes to
+
+    def take(self, index):
+        return RayBatch(*(field[index] for field in self))
+
+
+def concatenate_batches(batches: List[RayBatch]) -> RayBatch:
+    return RayBatch(*(np.concatenate(fields) for fields in zip(*batches)))
+
+
+# Nearest hits of the rays, traced in chunks of batch_size consecutive rays (bins of the
+# coherence order)
+def trace_batch(objects, origins, directions, batch_size: int) -> Tuple[np.ndarray, np.ndarray]:
+    t = np.empty(len(origins), dtype=origins.dtype)
+    hits = np.empty(len(origins), dtype=object)
+    for start in range(0, len(t), batch_size):
+        chunk = slice(start, start + batch_size)
+        t[chunk], hits[chunk] = nearest_intersected_batch(objects, origins[chunk], directions[chunk])
+    return t, hits
+
+
+# The (light, point indices, weights) to shade the points with: every light for every point, or
+# the lights a LightSampler picks for each point
+def light_assignments(lights, points) -> List[Tuple[LightSource, np.ndarray, np.ndarray]]:
+    if not isinstance(lights, LightSampler):
+        everywhere = np.arange(len(points))
+        return [(light, everywhere, np.ones(len(points), dtype=points.dtype)) for light in lights]
+    assigned = {}
+    for i, point in enumerate(points):
+        for light, weight in lights.sample(point):
+            indices, weights = assigned.setdefault(id(light), (light, [], []))[1:]
+            indices.append(i)
+            weights.append(weight)
+    return [
+        (light, np.array(indices, dtype=np.intp), np.array(weights, dtype=points.dtype))
+        for light, indices, weights in assigned.values()
+    ]
+
+
+# Shades the hits of one bounce: returns the local colors and the reflected and refracted rays.
+# This is the body of ray_trace applied to all the rays of a bounce at once, in the dtype of the rays.
+# The per-hit arrays keep their (N, 3) shape when there are no hits.
+def shade_batch(scene: Scene, rays: RayBatch, t, hits, model_func, batch_size) -> Tuple[np.ndarray, RayBatch]:
+    D = rays.directions
+    dtype = D.dtype
+    P = rays.origins + t[:, None] * D
+    n = np.array([obj.normal(p) for obj, p in zip(hits, P)], dtype=dtype).reshape(-1, 3)
+    facing = row_dot(n, D) > 0  # rays must be in the opposite direction from the normals
+    n[facing] = -n[facing]
+    V = D - 2 * row_dot(D, n)[:, None] * n
+    offsets = ray_offsets(P)[:, None]
+    _P = P + offsets * n
+    ambient = np.array([obj.ambient for obj in hits], dtype=dtype).reshape(-1, 3)
+    diffuse = np.array([obj.diffuse for obj in hits], dtype=dtype).reshape(-1, 3)
+    specular = np.array([obj.specular for obj in hits], dtype=dtype).reshape(-1, 3)
+    shininess = np.array([obj.shininess for obj in hits], dtype=dtype)
+    reflection = np.array([obj.reflection or 0 for obj in hits], dtype=dtype)
+    refraction = np.array([obj.refraction or 0 for obj in hits], dtype=dtype)
+    object_index = np.array([obj.refraction_index for obj in hits], dtype=dtype)
+
+    color = scene.ambient * ambient
+    for light, points, weights in light_assignments(scene.lights, _P):
+        L, distance, intensity = light.illuminate_batch(_P[points])
+        d, _ = trace_batch(scene.objects, _P[points], L, batch_size)
+        lit = ~((d != 0) & (d < distance))  # the shadow test of ray_trace
+        points, L, weights, intensity = points[lit], L[lit], weights[lit], intensity[lit]
+        normals = n[points]
+        color[points] += (weights[:, None] * intensity) * (
+            row_dot(L, normals)[:, None] * diffuse[points]
+            + model_func(normals, D[points], L, V[points], shininess[points])[:, None] * specular[points]
+        )
+
+    reflected = np.flatnonzero(reflection)
+    refracted = np.flatnonzero(refraction)
+    # Ray.calc_refraction for every refracted ray
+    nr, Dr, index = n[refracted], D[refracted], rays.refraction_index[refracted]
+    with np.errstate(invalid="ignore"):  # total internal reflection gives NaN directions, like ray_trace
+        cos_theta = row_dot(nr, Dr)
+        sin_theta = np.sqrt(1 - cos_theta * cos_theta)
+        r = index / object_index[refracted]
+        sin_alpha = r * sin_theta
+        cos_alpha = np.sqrt(1 - sin_alpha * sin_alpha)
+        L = r[:, None] * (cos_theta[:, None] * nr - Dr) - cos_alpha[:, None] * nr
+    secondary = concatenate_batches(
+        [
+            RayBatch(
+                _P[reflected],
+                V[reflected],
+                rays.refraction_index[reflected],
+                rays.throughput[reflected] * reflection[reflected, None],
+                rays.pixels[reflected],
+            ),
+            RayBatch(
+                P[refracted] - offsets[refracted] * nr,
+                L,
+                np.where(index == AIR_REFRACTION, object_index[refracted], AIR_REFRACTION),
+                rays.throughput[refracted] * refraction[refracted, None],
+                rays.pixels[refracted],
+            ),
+        ]
+    )
+    return color, secondary
+
+
+# Renders like render_scene, breadth first: all the rays of a bounce are traced together. Before
+# each bounce the rays are sorted by coherence_order and traced in bins of batch_size rays with
+# intersect_batch, which is vectorized for the primitives and traverses a BVH with whole packets.
+# The colors equal render_scene's up to the rounding of the sums.
+# dtype=np.float32 renders in single precision: the scene is compiled in float32 (see
+# compile_scene) and the ray batches and the returned image are float32. The rays spawned at a
+# hit point are offset by ray_offsets, which grows with the float32 spacing of the coordinates.
+def render_wavefront(
+    camera,
+    ambient,
+    lights,
+    objects,
+    screen_size,
+    max_depth,
+    render_model: RenderModel = RenderModel.default,
+    batch_size: int = 4096,
+    dtype=np.float64,
+):
+    scene = compile_scene(camera, ambient, lights, objects, dtype)
+    model_func = get_batch_model_func(render_model)
+    width, height = screen_size
+    ys, xs = screen_coordinates(screen_size)
+    grid_x, grid_y = np.meshgrid(xs, ys)
+    directions = np.column_stack((grid_x.ravel(), grid_y.ravel(), np.zeros(grid_x.size))) - scene.camera
+    directions /= np.linalg.norm(directions, axis=1)[:, None]
+    count = len(directions)
+    rays = RayBatch(
+        np.broadcast_to(scene.camera, (count, 3)),
+        directions.astype(dtype, copy=False),
+        np.full(count, AIR_REFRACTION, dtype=dtype),
+        np.ones((count, 3), dtype=dtype),
+        np.arange(count),
+    )
+    image = np.zeros((count, 3), dtype=dtype)
+    for _ in range(max_depth):
+        if not len(rays.pixels):
+            break
+        rays = rays.take(coherence_order(rays.origins, rays.directions))
+        t, hits = trace_batch(scene.objects, rays.origins, rays.directions, batch_size)
+        hit = np.flatnonzero(hits != None)
+        if not hit.size:  # every ray left the scene
+            break
+        hit_rays = rays.take(hit)
+        color, rays = shade_batch(scene, hit_rays, t[hit], hits[hit], model_func, batch_size)
+        np.add.at(image, hit_rays.pixels, hit_rays.throughput * color)
+    return np.clip(image.reshape(height, width, 3), 0, 1)